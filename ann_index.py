@@ -0,0 +1,216 @@
+import json
+import os
+import re
+import zlib
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+from chunk_store import ChunkStore
+
+ANN_DIR = "ann"
+
+def hashing_embed(texts: List[str], dim: int = 512) -> np.ndarray:
+    """
+    Small local embedding: signed feature hashing of word unigrams and bigrams.
+
+    Needs no model, is deterministic across processes, and is good enough to pull
+    a few hundred lexically related candidates for the reranker to sort out.
+
+    Returns:
+        np.ndarray: (len(texts), dim) L2-normalized float32 vectors
+    """
+    rows, cols, values = [], [], []
+    for row, text in enumerate(texts):
+        words = re.findall(r"\w+", text.lower())
+        for feature in words + [a + " " + b for a, b in zip(words, words[1:])]:
+            h = zlib.crc32(feature.encode("utf-8"))
+            rows.append(row)
+            cols.append(h % dim)
+            values.append(1.0 if h & 0x80000000 else -1.0)
+
+    vectors = np.zeros((len(texts), dim), dtype=np.float32)
+    np.add.at(vectors, (np.array(rows, dtype=np.int64), np.array(cols, dtype=np.int64)), np.array(values, dtype=np.float32))
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    k = min(k, len(scores))
+    if k == 0:
+        return np.zeros(0, dtype=np.int64)
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top], kind="stable")]
+
+class IVFIndex:
+    """
+    Inverted-file index over normalized vectors (inner product = cosine).
+
+    Vectors are clustered with k-means; a search scores the centroids, probes the
+    n_probe closest lists and scores only the vectors in them.
+    """
+
+    def __init__(self, centroids: np.ndarray, vectors: np.ndarray, list_ids: np.ndarray, list_offsets: np.ndarray, config: dict):
+        self.centroids = centroids
+        self.vectors = vectors
+        self.list_ids = list_ids
+        self.list_offsets = list_offsets
+        self.config = config
+
+    @classmethod
+    def build(cls, vectors: np.ndarray, n_lists: Optional[int] = None, iterations: int = 10,
+              sample_size: int = 100_000, seed: int = 0, **config) -> "IVFIndex":
+        """
+        Train the coarse quantizer on a sample and assign every vector to a list.
+
+        Args:
+            vectors: (n, dim) L2-normalized vectors, row i is chunk ID i; with
+                no rows the index has no lists and every search returns nothing
+            n_lists: Number of inverted lists (defaults to about sqrt(n))
+            iterations: k-means iterations
+            sample_size: Number of vectors used to train the centroids
+            seed: Random seed
+            **config: Extra settings stored with the index (e.g. the embedder)
+        """
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        n = len(vectors)
+        if n == 0:
+            config = dict(config, n_lists=0, dim=vectors.shape[1])
+            return cls(np.zeros((0, vectors.shape[1]), dtype=np.float32), vectors,
+                       np.zeros(0, dtype=np.int64), np.zeros(1, dtype=np.int64), config)
+        n_lists = max(1, min(n_lists or int(np.sqrt(n)), n))
+        rng = np.random.default_rng(seed)
+
+        sample = vectors[rng.choice(n, size=min(sample_size, n), replace=False)]
+        centroids = sample[rng.choice(len(sample), size=n_lists, replace=False)].copy()
+        for _ in range(iterations):
+            assignment = cls._assign(sample, centroids)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignment, sample)
+            counts = np.bincount(assignment, minlength=n_lists)
+            empty = counts == 0
+            sums[empty] = sample[rng.choice(len(sample), size=int(empty.sum()))]
+            centroids = sums / np.maximum(np.linalg.norm(sums, axis=1, keepdims=True), 1e-12)
+
+        assignment = cls._assign(vectors, centroids)
+        order = np.argsort(assignment, kind="stable")
+        list_offsets = np.concatenate([[0], np.cumsum(np.bincount(assignment, minlength=n_lists))])
+        config = dict(config, n_lists=n_lists, dim=vectors.shape[1])
+        return cls(centroids, vectors, order.astype(np.int64), list_offsets.astype(np.int64), config)
+
+    @staticmethod
+    def _assign(vectors: np.ndarray, centroids: np.ndarray, batch_size: int = 65536) -> np.ndarray:
+        assignment = np.empty(len(vectors), dtype=np.int64)
+        for start in range(0, len(vectors), batch_size):
+            assignment[start:start + batch_size] = np.argmax(vectors[start:start + batch_size] @ centroids.T, axis=1)
+        return assignment
+
+    def search(self, query_vector: np.ndarray, k: int = 200, n_probe: int = 16) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Approximate top-k chunk IDs by inner product.
+
+        More probed lists trade latency for recall; probing every list is exact.
+
+        Returns:
+            tuple: (chunk IDs, scores), best first
+        """
+        lists = _top_k(self.centroids @ query_vector, n_probe)
+        candidates = np.concatenate([np.zeros(0, dtype=np.int64)] + [
+            self.list_ids[self.list_offsets[i]:self.list_offsets[i + 1]] for i in lists
+        ])
+        scores = self.vectors[candidates] @ query_vector
+        top = _top_k(scores, k)
+        return candidates[top], scores[top]
+
+    def save(self, path: str):
+        os.makedirs(path, exist_ok=True)
+        np.save(os.path.join(path, "centroids.npy"), self.centroids)
+        np.save(os.path.join(path, "vectors.npy"), self.vectors)
+        np.save(os.path.join(path, "list_ids.npy"), self.list_ids)
+        np.save(os.path.join(path, "list_offsets.npy"), self.list_offsets)
+        with open(os.path.join(path, "config.json"), "w") as f:
+            json.dump(self.config, f)
+
+    @classmethod
+    def load(cls, path: str) -> "IVFIndex":
+        """
+        Memory-map a saved index.
+        """
+        with open(os.path.join(path, "config.json")) as f:
+            config = json.load(f)
+        return cls(
+            np.load(os.path.join(path, "centroids.npy")),
+            np.load(os.path.join(path, "vectors.npy"), mmap_mode="r"),
+            np.load(os.path.join(path, "list_ids.npy"), mmap_mode="r"),
+            np.load(os.path.join(path, "list_offsets.npy")),
+            config
+        )
+
+def build_store_index(
+    store_path: str,
+    embed_fn: Optional[Callable[[List[str]], np.ndarray]] = None,
+    n_lists: Optional[int] = None,
+    batch_size: int = 4096
+) -> IVFIndex:
+    """
+    Embed every chunk of a chunk store and save an IVF index inside it (offline).
+
+    Args:
+        store_path: Chunk store directory written by ChunkStoreWriter
+        embed_fn: Embedding function (hashing_embed if omitted; custom functions
+            must also be passed to CorpusRetriever, and are called with an empty
+            list for an empty store to learn the dimension)
+        n_lists: Number of inverted lists
+        batch_size: Chunks embedded per call
+
+    Returns:
+        IVFIndex: The saved index
+    """
+    embed_fn = embed_fn or hashing_embed
+    with ChunkStore(store_path) as store:
+        vectors = np.concatenate([
+            embed_fn(store.get_many(range(start, min(start + batch_size, len(store)))))
+            for start in range(0, len(store), batch_size)
+        ] or [embed_fn([])])
+    index = IVFIndex.build(vectors, n_lists, embedder=getattr(embed_fn, "__name__", "custom"))
+    index.save(os.path.join(store_path, ANN_DIR))
+    return index
+
+class CorpusRetriever:
+    """
+    Server-side candidate fetch: query -> top chunk IDs and texts of one corpus.
+    """
+
+    def __init__(self, store_path: str, embed_fn: Optional[Callable[[List[str]], np.ndarray]] = None, n_probe: int = 16):
+        self.store = ChunkStore(store_path)
+        self.index = IVFIndex.load(os.path.join(store_path, ANN_DIR))
+        self.embed_fn = embed_fn or hashing_embed
+        self.n_probe = n_probe
+
+    def fetch(self, query: str, candidates: int = 200, n_probe: Optional[int] = None) -> Tuple[List[int], List[str]]:
+        """
+        Returns:
+            tuple: (chunk IDs, chunk texts) of the nearest candidates, best first
+        """
+        query_vector = self.embed_fn([query])[0]
+        chunk_ids, _ = self.index.search(query_vector, candidates, n_probe or self.n_probe)
+        chunk_ids = [int(chunk_id) for chunk_id in chunk_ids]
+        return chunk_ids, self.store.get_many(chunk_ids)
+
+def load_corpora(corpus_dir: str, **retriever_options) -> dict:
+    """
+    Open every indexed chunk store under corpus_dir, keyed by directory name.
+    """
+    corpora = {}
+    for name in sorted(os.listdir(corpus_dir)):
+        path = os.path.join(corpus_dir, name)
+        if os.path.isdir(os.path.join(path, ANN_DIR)):
+            corpora[name] = CorpusRetriever(path, **retriever_options)
+    return corpora
+
+# Example usage
+if __name__ == "__main__":
+    import sys
+
+    # Build the index of a chunk store produced by the chunking pipeline
+    index = build_store_index(sys.argv[1])
+    print(f"Indexed {len(index.vectors)} chunks into {index.config['n_lists']} lists")
@@ -0,0 +1,205 @@
+import argparse
+import collections
+import itertools
+import json
+import multiprocessing
+import os
+import time
+
+from script_helpers import load_handler
+
+# Per-process handler chain, set up once by init_worker
+_worker = {}
+
+def init_worker(handler_path, model_dir, threads):
+    """
+    Load the handler and model in a worker process
+    """
+    handler = load_handler(handler_path)
+    if threads:
+        handler.torch.set_num_threads(threads)
+    _worker["handler"] = handler
+    _worker["model"] = handler.model_fn(model_dir)
+
+def rerank_records(records):
+    """
+    Run a batch of (line_number, raw JSON line) records through the handler chain
+
+    Returns:
+        tuple: (output lines, number of query-document pairs)
+    """
+    handler = _worker["handler"]
+    model = _worker["model"]
+    lines = []
+    pairs = 0
+    for line_number, raw in records:
+        output = {"line": line_number}
+        try:
+            input_data = handler.input_fn(raw, "application/json")
+            output["id"] = input_data.get("id")
+            pairs += len(input_data.get("documents", []))
+            prediction = handler.predict_fn(input_data, model)
+            body = handler.output_fn(prediction, "application/json")
+            output["response"] = json.loads(body[0] if isinstance(body, tuple) else body)
+        except Exception as error:
+            output["error"] = f"{type(error).__name__}: {error}"
+        lines.append(json.dumps(output))
+    return lines, pairs
+
+def read_checkpoint(path):
+    if not os.path.exists(path):
+        return {"records_done": 0, "output_bytes": 0, "pairs_done": 0}
+    with open(path) as f:
+        return json.load(f)
+
+def write_checkpoint(path, checkpoint):
+    """
+    Atomically replace the checkpoint file
+    """
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(checkpoint, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+def iter_record_batches(input_path, skip, records_per_batch):
+    """
+    Stream (line_number, raw line) batches of non-empty input lines, skipping finished ones
+    """
+    with open(input_path) as f:
+        records = ((n, line) for n, line in enumerate(f) if line.strip())
+        records = itertools.islice(records, skip, None)
+        while True:
+            batch = list(itertools.islice(records, records_per_batch))
+            if not batch:
+                return
+            yield batch
+
+def run_batch_rerank(
+    input_path,
+    output_path,
+    model_dir="/opt/ml/model",
+    workers=1,
+    records_per_batch=64,
+    threads_per_worker=None,
+    handler_path=None,
+    checkpoint_path=None,
+    report_every=30.0
+):
+    """
+    Rerank every record of a JSONL file, resuming from the last checkpoint
+
+    Batches are processed by worker processes but written strictly in input
+    order; after each written batch the output is flushed and the checkpoint
+    records how many input records and output bytes are final. On resume the
+    output is cut back to that size, so a job killed mid-write loses no work
+    beyond the batches in flight.
+
+    Args:
+        input_path (str): JSONL file of requests in the test_endpoint payload shape
+        output_path (str): JSONL file of {"line", "id", "response" | "error"} records
+        model_dir (str): Directory passed to model_fn
+        workers (int): Worker processes (0 runs in this process)
+        records_per_batch (int): Records per task sent to a worker
+        threads_per_worker (int): Torch threads per worker (defaults to CPUs / workers)
+        handler_path (str): Handler script (defaults to inference-script.py)
+        checkpoint_path (str): Checkpoint file (defaults to output_path + ".checkpoint")
+        report_every (float): Seconds between progress lines
+
+    Returns:
+        dict: Records, pairs, elapsed seconds and pairs/sec of this run
+    """
+    checkpoint_path = checkpoint_path or output_path + ".checkpoint"
+    checkpoint = read_checkpoint(checkpoint_path)
+    if checkpoint["records_done"]:
+        print(f"Resuming after {checkpoint['records_done']} records")
+
+    threads = threads_per_worker or max(1, (os.cpu_count() or 1) // max(1, workers))
+    batches = iter_record_batches(input_path, checkpoint["records_done"], records_per_batch)
+
+    mode = "r+" if os.path.exists(output_path) else "w"
+    output = open(output_path, mode)
+    output.truncate(checkpoint["output_bytes"])
+    output.seek(checkpoint["output_bytes"])
+
+    if workers:
+        pool = multiprocessing.get_context("spawn").Pool(
+            workers, initializer=init_worker, initargs=(handler_path, model_dir, threads)
+        )
+        submit = lambda batch: pool.apply_async(rerank_records, (batch,))
+        collect = lambda pending: pending.get()
+    else:
+        pool = None
+        init_worker(handler_path, model_dir, threads)
+        submit = lambda batch: batch
+        collect = rerank_records
+
+    progress = {"records": 0, "pairs": 0, "start": time.perf_counter(), "last_report": time.perf_counter()}
+
+    def finish(size, pending):
+        lines, batch_pairs = collect(pending)
+        output.write("".join(line + "\n" for line in lines))
+        output.flush()
+        os.fsync(output.fileno())
+
+        progress["records"] += size
+        progress["pairs"] += batch_pairs
+        checkpoint["records_done"] += size
+        checkpoint["pairs_done"] += batch_pairs
+        checkpoint["output_bytes"] = output.tell()
+        write_checkpoint(checkpoint_path, checkpoint)
+
+        now = time.perf_counter()
+        if now - progress["last_report"] >= report_every:
+            rate = progress["pairs"] / (now - progress["start"])
+            print(f"{checkpoint['records_done']} records, {rate:.1f} pairs/sec")
+            progress["last_report"] = now
+
+    # Keep every worker busy without reading the whole input ahead
+    in_flight = collections.deque()
+    try:
+        for batch in batches:
+            in_flight.append((len(batch), submit(batch)))
+            if len(in_flight) >= 2 * max(1, workers):
+                finish(*in_flight.popleft())
+        while in_flight:
+            finish(*in_flight.popleft())
+    finally:
+        output.close()
+        if pool is not None:
+            pool.terminate()
+
+    elapsed = time.perf_counter() - progress["start"]
+    return {
+        "records": progress["records"],
+        "pairs": progress["pairs"],
+        "records_total": checkpoint["records_done"],
+        "elapsed_seconds": elapsed,
+        "pairs_per_second": progress["pairs"] / max(elapsed, 1e-9)
+    }
+
+# Example usage
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline batch rerank of a JSONL file with checkpoint/resume")
+    parser.add_argument("input", help="JSONL file of {query, documents, top_k, ...} requests")
+    parser.add_argument("output", help="JSONL file to append results to")
+    parser.add_argument("--model-dir", default="/opt/ml/model", help="Directory passed to model_fn")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes (0 runs in-process)")
+    parser.add_argument("--records-per-batch", type=int, default=64)
+    parser.add_argument("--threads-per-worker", type=int, default=None)
+    parser.add_argument("--handler", default=None, help="Handler script (defaults to inference-script.py)")
+    parser.add_argument("--checkpoint", default=None, help="Checkpoint file (defaults to OUTPUT.checkpoint)")
+    args = parser.parse_args()
+
+    report = run_batch_rerank(
+        args.input,
+        args.output,
+        model_dir=args.model_dir,
+        workers=args.workers,
+        records_per_batch=args.records_per_batch,
+        threads_per_worker=args.threads_per_worker,
+        handler_path=args.handler,
+        checkpoint_path=args.checkpoint
+    )
+    print(json.dumps(report, indent=2))
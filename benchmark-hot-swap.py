@@ -0,0 +1,80 @@
+import argparse
+import json
+import threading
+import time
+
+import numpy as np
+
+from script_helpers import load_script
+
+def phase_report(load_generator, records):
+    if not records:
+        return {"requests": 0}
+    latencies = 1000 * np.array([record["done"] - record["intended"] for record in records])
+    report = load_generator.latency_percentiles(latencies)
+    report["requests"] = len(records)
+    report["errors"] = sum(record["error"] is not None for record in records)
+    return report
+
+def benchmark_hot_swap(handler, load_generator, model, new_model, qps, count, swap_after, warmup_lengths=None, doc_count="uniform:10,40"):
+    """
+    Swap the base model under open-loop traffic and compare latency around the swap
+
+    Requests are grouped by intended send time into before the swap started,
+    while the new version was loading, warming and draining, and after it
+    finished. Send times are measured from just before the load run starts.
+
+    Returns:
+        dict: Latency percentiles (ms) and errors per phase, the latency of the
+        first requests after the swap, and the swap status (load, warmup and
+        drain times)
+    """
+    requests = load_generator.synthesize_requests(count, doc_count, "uniform:20,60")
+    offsets = load_generator.schedule(requests, qps=qps)
+    invoke = load_generator.local_invoke({"local": (handler, model)})
+
+    result = {}
+    start = time.perf_counter()
+    sender = threading.Thread(
+        target=lambda: result.update(records=load_generator.run_load(requests, offsets, invoke, "local", concurrency=256))
+    )
+    sender.start()
+
+    time.sleep(swap_after)
+    swap_started = time.perf_counter() - start
+    status = handler.swap_model(new_model, warmup_lengths=warmup_lengths, wait=True)
+    swap_finished = time.perf_counter() - start
+    sender.join()
+
+    records = result["records"]
+    after = sorted((record for record in records if record["intended"] > swap_finished), key=lambda record: record["intended"])
+    return {
+        "qps": qps,
+        "warmup_lengths": handler.WARMUP_LENGTHS if warmup_lengths is None else warmup_lengths,
+        "swap_started_s": swap_started,
+        "swap_seconds": swap_finished - swap_started,
+        "swap": status,
+        "before": phase_report(load_generator, [record for record in records if record["intended"] < swap_started]),
+        "during": phase_report(load_generator, [record for record in records if swap_started <= record["intended"] <= swap_finished]),
+        "after": phase_report(load_generator, after),
+        "first_after_ms": [1000 * (record["done"] - record["intended"]) for record in after[:5]]
+    }
+
+# Example usage
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Latency of the rerank handler while its model is hot-swapped")
+    parser.add_argument("--model-dir", default="/opt/ml/model", help="Directory passed to model_fn")
+    parser.add_argument("--new-model", required=True, help="Local path of the model version to swap in")
+    parser.add_argument("--qps", type=float, default=5)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--swap-after", type=float, default=5.0, help="Seconds of traffic before the swap starts")
+    parser.add_argument("--warmup-lengths", type=int, nargs="*", default=None, help="Token lengths to warm the new model on (none disables warmup)")
+    args = parser.parse_args()
+
+    handler = load_script("inference-script.py")
+    load_generator = load_script("load-generator.py")
+    model = handler.model_fn(args.model_dir)
+    handler.warmup_model(model)
+
+    report = benchmark_hot_swap(handler, load_generator, model, args.new_model, args.qps, args.requests, args.swap_after, args.warmup_lengths)
+    print(json.dumps(report, indent=2))
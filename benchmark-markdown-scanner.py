@@ -0,0 +1,85 @@
+import argparse
+import json
+import random
+import textwrap
+
+from deepseek_detect_sections import classify_lines, process_tables
+from markdown_scanner import scan_blocks
+from script_helpers import VOCABULARY, load_script, timed
+
+def synthetic_markdown(sections, table_every=10, wrap=80, seed=0):
+    """
+    Prose-heavy markdown: a heading and a few paragraphs per section, with a table every table_every sections
+
+    Paragraphs are hard-wrapped at wrap columns (0 keeps each on one line).
+    """
+    rng = random.Random(seed)
+    parts = []
+    for i in range(sections):
+        parts.append(f"## Section {i}")
+        for _ in range(rng.randint(2, 5)):
+            paragraph = " ".join(rng.choices(VOCABULARY, k=rng.randint(40, 120)))
+            parts.extend(textwrap.wrap(paragraph, wrap) if wrap else [paragraph])
+            parts.append("")
+        if i % table_every == 0:
+            parts.append("Rates for this scheme:")
+            parts.append("| Tenure | Rate |")
+            parts.append("| --- | --- |")
+            parts.extend(f"| {n} days | {rng.uniform(3, 8):.2f}% |" for n in range(7, 7 + 10 * rng.randint(3, 12), 10))
+            parts.append("")
+    return "\n".join(parts)
+
+def benchmark_scanner(text, chunk_chars=2000, repeats=5):
+    """
+    Compare line-by-line processing with whole-buffer scanning on one document
+
+    Returns:
+        dict: Block counts and timings of structure detection (classify_lines
+        vs scan_blocks on str and bytes) and of table carry-over across chunks
+        (process_tables vs deepseek-example.py), with a check that both
+        table processors produce the same chunks
+    """
+    deepseek_example = load_script("deepseek-example.py")
+    chunks = [text[i:i + chunk_chars] for i in range(0, len(text), chunk_chars)]
+    data = text.encode()
+
+    kinds, lines_seconds = timed(lambda: classify_lines(text.split("\n"))[0], repeats)
+    blocks, scan_seconds = timed(lambda: list(scan_blocks(text)), repeats)
+    _, bytes_seconds = timed(lambda: list(scan_blocks(memoryview(data))), repeats)
+
+    line_chunks, line_tables_seconds = timed(lambda: process_tables(chunks), repeats)
+    scanned_chunks, scan_tables_seconds = timed(lambda: deepseek_example.process_chunks(chunks), repeats)
+
+    return {
+        "characters": len(text),
+        "lines": len(kinds),
+        "blocks": {kind: sum(block[0] == kind for block in blocks) for kind in ("heading", "table", "table_rows")},
+        "classify_lines_ms": 1000 * lines_seconds,
+        "scan_blocks_ms": 1000 * scan_seconds,
+        "scan_blocks_bytes_ms": 1000 * bytes_seconds,
+        "structure_speedup": lines_seconds / max(scan_seconds, 1e-9),
+        "chunks": len(chunks),
+        "process_tables_ms": 1000 * line_tables_seconds,
+        "scanned_process_chunks_ms": 1000 * scan_tables_seconds,
+        "tables_speedup": line_tables_seconds / max(scan_tables_seconds, 1e-9),
+        "identical_output": line_chunks == scanned_chunks
+    }
+
+# Example usage
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark whole-buffer markdown scanning against per-line loops")
+    parser.add_argument("--input", default=None, help="Markdown file (defaults to a synthetic prose-heavy document)")
+    parser.add_argument("--sections", type=int, default=2000)
+    parser.add_argument("--table-every", type=int, default=10, help="Synthetic document: sections per table")
+    parser.add_argument("--wrap", type=int, default=80, help="Synthetic document: wrap column (0 for one line per paragraph)")
+    parser.add_argument("--chunk-chars", type=int, default=2000)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.input:
+        with open(args.input) as f:
+            text = f.read()
+    else:
+        text = synthetic_markdown(args.sections, args.table_every, args.wrap)
+
+    print(json.dumps(benchmark_scanner(text, args.chunk_chars, args.repeats), indent=2))
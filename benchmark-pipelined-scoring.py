@@ -0,0 +1,57 @@
+import argparse
+import json
+import time
+
+import numpy as np
+
+from script_helpers import load_handler, synthetic_documents
+
+def benchmark_pipeline(handler, model, query, documents, queue_size=2):
+    """
+    Compare sequential and pipelined scoring of one large request
+
+    Returns:
+        dict: Wall time of both paths, per-stage busy time of the pipeline, the
+        overlap it achieved, and how much of the tokenization time it hid
+    """
+    sequential = handler.score_pairs_with_prefix_cache if handler.PREFIX_CACHE_SCORING else handler.score_pairs
+
+    start = time.perf_counter()
+    sequential_scores = sequential(model, query, documents)
+    sequential_seconds = time.perf_counter() - start
+
+    timings = {}
+    pipelined_scores = handler.score_pairs_pipelined(model, query, documents, queue_size=queue_size, timings=timings)
+
+    saved_ms = 1000 * sequential_seconds - timings["wall_ms"]
+    return {
+        "documents": len(documents),
+        "sequential_ms": 1000 * sequential_seconds,
+        "pipelined_ms": timings["wall_ms"],
+        "speedup": 1000 * sequential_seconds / timings["wall_ms"],
+        "tokenize_ms": timings["tokenize_ms"],
+        "model_ms": timings["model_ms"],
+        "assemble_ms": timings["assemble_ms"],
+        "overlap": timings["overlap"],
+        "tokenize_hidden_fraction": max(0.0, saved_ms) / max(timings["tokenize_ms"], 1e-9),
+        "max_score_difference": float(np.max(np.abs(sequential_scores - pipelined_scores)))
+    }
+
+# Example usage
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure tokenization/model overlap of pipelined scoring")
+    parser.add_argument("--model-dir", default="/opt/ml/model", help="Directory passed to model_fn")
+    parser.add_argument("--documents", type=int, nargs="+", default=[500, 1000, 2000])
+    parser.add_argument("--query", default="What is the interest rate on a fixed deposit for senior citizens?")
+    parser.add_argument("--queue-size", type=int, default=2)
+    args = parser.parse_args()
+
+    handler = load_handler()
+    model = handler.model_fn(args.model_dir)
+
+    # Warm up kernels and the tokenizer before timing
+    handler.score_pairs_pipelined(model, args.query, synthetic_documents(64))
+
+    for count in args.documents:
+        report = benchmark_pipeline(handler, model, args.query, synthetic_documents(count), args.queue_size)
+        print(json.dumps(report, indent=2))
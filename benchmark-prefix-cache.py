@@ -0,0 +1,64 @@
+import argparse
+import json
+import sys
+
+import numpy as np
+
+from script_helpers import load_handler, random_text, timed
+
+def benchmark_prefix_cache(handler, model, query_words, documents, repeats=3):
+    """
+    Compare prefix-cached scoring against packed full-sequence scoring and model.rank
+
+    Returns:
+        dict: Prefix and pair token counts, latency of both vectorized paths,
+        the largest score difference between them, and the score differences
+        and top-10 agreement against model.rank
+    """
+    query = random_text(query_words, seed=query_words)
+    head, tail, _, lengths, _ = handler.encode_pairs(model, query, documents)
+
+    reference = model.predict([query] * len(documents), documents).numpy()
+    full_scores, full_seconds = timed(lambda: handler.score_pairs(model, query, documents), repeats)
+    cached_scores, cached_seconds = timed(lambda: handler.score_pairs_with_prefix_cache(model, query, documents), repeats)
+
+    top = np.argsort(-reference, kind="stable")[:10]
+    return {
+        "query_words": query_words,
+        "prefix_tokens": len(head),
+        "mean_pair_tokens": float(len(head) + len(tail) + lengths.mean()),
+        "documents": len(documents),
+        "full_ms": 1000 * full_seconds,
+        "prefix_cache_ms": 1000 * cached_seconds,
+        "speedup": full_seconds / max(cached_seconds, 1e-9),
+        "max_diff_vs_full": float(np.max(np.abs(cached_scores - full_scores))),
+        "max_diff_vs_rank": float(np.max(np.abs(cached_scores - reference))),
+        "top10_match": bool((np.argsort(-cached_scores, kind="stable")[:10] == top).all())
+    }
+
+# Example usage
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Parity check and benchmark of query-prefix KV-cache reuse")
+    parser.add_argument("--model-dir", default="/opt/ml/model", help="Directory passed to model_fn")
+    parser.add_argument("--query-words", type=int, nargs="+", default=[8, 32, 128, 256])
+    parser.add_argument("--documents", type=int, default=200)
+    parser.add_argument("--document-words", type=int, default=60)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--tolerance", type=float, default=1e-3, help="Largest allowed score difference (raise for fp16/bf16 models)")
+    args = parser.parse_args()
+
+    handler = load_handler()
+    model = handler.model_fn(args.model_dir)
+    documents = [random_text(args.document_words, seed=1000 + i) for i in range(args.documents)]
+
+    failures = []
+    for query_words in args.query_words:
+        report = benchmark_prefix_cache(handler, model, query_words, documents, args.repeats)
+        print(json.dumps(report, indent=2))
+        if max(report["max_diff_vs_full"], report["max_diff_vs_rank"]) > args.tolerance:
+            failures.append(query_words)
+
+    if failures:
+        print(f"Parity check failed for query lengths {failures}: prefix-cached scores differ by more than {args.tolerance}")
+        sys.exit(1)
+    print(f"Parity check passed (tolerance {args.tolerance})")
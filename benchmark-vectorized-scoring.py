@@ -0,0 +1,51 @@
+import argparse
+import json
+
+import numpy as np
+
+from script_helpers import load_handler, synthetic_documents, timed
+
+def benchmark_scoring(handler, model, query, documents, top_k=10, repeats=3):
+    """
+    Compare the vectorized scoring path against model.rank on one request
+
+    Returns:
+        dict: Latency of both paths for the scoring call and for predict_fn,
+        and the largest score difference between them
+    """
+    groups = [list(range(len(documents)))]
+    request = {"query": query, "documents": documents, "top_k": top_k, "return_documents": False}
+
+    handler.VECTORIZED_SCORING = False
+    rank_scores, rank_seconds = timed(lambda: handler.score_texts(model, query, documents, groups), repeats)
+    _, rank_predict_seconds = timed(lambda: handler.predict_fn(dict(request), model), repeats)
+
+    handler.VECTORIZED_SCORING = True
+    vectorized_scores, vectorized_seconds = timed(lambda: handler.score_texts(model, query, documents, groups), repeats)
+    _, vectorized_predict_seconds = timed(lambda: handler.predict_fn(dict(request), model), repeats)
+
+    return {
+        "documents": len(documents),
+        "rank_ms": 1000 * rank_seconds,
+        "vectorized_ms": 1000 * vectorized_seconds,
+        "rank_predict_ms": 1000 * rank_predict_seconds,
+        "vectorized_predict_ms": 1000 * vectorized_predict_seconds,
+        "speedup": rank_seconds / max(vectorized_seconds, 1e-9),
+        "max_score_difference": float(np.max(np.abs(rank_scores - vectorized_scores)))
+    }
+
+# Example usage
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark vectorized pair packing against model.rank")
+    parser.add_argument("--model-dir", default="/opt/ml/model", help="Directory passed to model_fn")
+    parser.add_argument("--documents", type=int, nargs="+", default=[100, 1000])
+    parser.add_argument("--query", default="What is the interest rate on a fixed deposit for senior citizens?")
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    handler = load_handler()
+    model = handler.model_fn(args.model_dir)
+
+    for count in args.documents:
+        report = benchmark_scoring(handler, model, args.query, synthetic_documents(count), repeats=args.repeats)
+        print(json.dumps(report, indent=2))
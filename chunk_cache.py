@@ -0,0 +1,224 @@
+import hashlib
+import inspect
+import json
+import os
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Union
+
+from token_count_cache import tokenizer_name
+
+def _digest(data: bytes) -> str:
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+def _settings(obj) -> Dict[str, Any]:
+    return {
+        name: value for name, value in vars(obj).items()
+        if not name.startswith("_") and isinstance(value, (bool, int, float, str, type(None)))
+    }
+
+def chunker_config_hash(chunker, **extra) -> str:
+    """
+    Canonical hash of everything that decides a chunker's output.
+
+    Covers the RecursiveRules levels, the public scalar settings of the rules
+    and the chunker (chunk_size, overlap, minimum chunk size, return type, ...)
+    and the tokenizer identity (token_count_cache.tokenizer_name, a digest of
+    the vocabulary for HF tokenizers). Private attributes such as the multiprocessing flag
+    and objects attached to the tokenizer (token count caches) are left out,
+    so changing them keeps cached results valid.
+
+    Args:
+        chunker: Configured chonkie chunker such as RecursiveChunker
+        **extra: Further settings that change the output (JSON-serializable)
+
+    Returns:
+        Hex digest
+    """
+    rules = chunker.rules
+    levels = rules.to_dict()["levels"] if hasattr(rules, "to_dict") else [vars(level) for level in rules.levels]
+    config = {
+        "levels": levels,
+        "rules": _settings(rules),
+        "chunker": _settings(chunker),
+        "tokenizer": tokenizer_name(chunker.tokenizer),
+        "extra": extra,
+    }
+    return _digest(json.dumps(config, sort_keys=True, separators=(",", ":"), default=str).encode("utf-8"))
+
+def processor_version(post_processor: Optional[Callable]) -> str:
+    """
+    Version string of a chunk post-processor.
+
+    Uses a __version__ attribute when the processor has one, otherwise its
+    qualified name and a hash of its source, so editing the function
+    invalidates its cached results (edits to helpers it calls do not; give
+    those processors an explicit version).
+    """
+    if post_processor is None:
+        return "none"
+    version = getattr(post_processor, "__version__", None)
+    if version is not None:
+        return str(version)
+    name = f"{getattr(post_processor, '__module__', '')}.{getattr(post_processor, '__qualname__', repr(post_processor))}"
+    try:
+        return f"{name}:{_digest(inspect.getsource(post_processor).encode('utf-8'))}"
+    except (OSError, TypeError):
+        return name
+
+class ChunkCache:
+    """
+    Content-addressed on-disk cache of final chunk lists.
+
+    An entry is keyed by the hash of the document bytes, the chunker config hash
+    and the post-processor version, so unchanged documents skip chunking and
+    post-processing entirely while any change to the rules, chunk size, overlap
+    or processor produces new keys. Old entries are never invalidated, only
+    evicted: the store is bounded by max_bytes and evicts least recently used
+    entries first (recency survives restarts through file modification times).
+
+    Each entry is one JSON file written atomically, so several processes can
+    share a directory; an entry evicted by another process is simply a miss.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 1 << 30):
+        """
+        Args:
+            path: Cache directory (created if missing)
+            max_bytes: Size bound of the stored entries
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+
+        # key -> size in bytes, least recently used first
+        self.entries: "OrderedDict[str, int]" = OrderedDict()
+        self.total_bytes = 0
+        os.makedirs(path, exist_ok=True)
+        found = []
+        for shard in os.scandir(path):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if entry.name.endswith(".json"):
+                    stat = entry.stat()
+                    found.append((stat.st_mtime, entry.name[:-5], stat.st_size))
+        for _, key, size in sorted(found):
+            self.entries[key] = size
+            self.total_bytes += size
+
+    @staticmethod
+    def key(document: Union[str, bytes], config_hash: str, version: str) -> str:
+        """
+        Cache key of a document under a chunker config and post-processor version.
+        """
+        data = document.encode("utf-8") if isinstance(document, str) else document
+        return _digest(f"{_digest(data)}:{config_hash}:{version}".encode("utf-8"))
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.path, key[:2], key + ".json")
+
+    def get(self, key: str) -> Optional[List[Any]]:
+        """
+        Cached chunk list, or None on a miss.
+        """
+        path = self._entry_path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            chunks = json.loads(data)["chunks"]
+            os.utime(path)
+        except (FileNotFoundError, ValueError, KeyError):
+            self.misses += 1
+            self._forget(key)
+            return None
+
+        self.hits += 1
+        if key in self.entries:
+            self.entries.move_to_end(key)
+        else:
+            # Written by another process since this one scanned the directory
+            self.entries[key] = len(data)
+            self.total_bytes += len(data)
+        return chunks
+
+    def put(self, key: str, chunks: List[Any]):
+        """
+        Store a chunk list (texts, or dicts with metadata), evicting old entries past max_bytes.
+        """
+        path = self._entry_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        data = json.dumps({"chunks": chunks}, ensure_ascii=False).encode("utf-8")
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+        self._forget(key)
+        self.entries[key] = len(data)
+        self.total_bytes += len(data)
+        self.writes += 1
+
+        while self.total_bytes > self.max_bytes and len(self.entries) > 1:
+            old_key, size = self.entries.popitem(last=False)
+            self.total_bytes -= size
+            self.evictions += 1
+            try:
+                os.remove(self._entry_path(old_key))
+            except FileNotFoundError:
+                pass
+
+    def _forget(self, key: str):
+        size = self.entries.pop(key, None)
+        if size is not None:
+            self.total_bytes -= size
+
+    def chunk(
+        self,
+        document: str,
+        chunker,
+        post_processor: Optional[Callable[[List[Any]], List[Any]]] = None,
+        config_hash: Optional[str] = None,
+        version: Optional[str] = None
+    ) -> List[Any]:
+        """
+        Chunk and post-process a document, or return the cached result.
+
+        Args:
+            document: Document text
+            chunker: Configured chonkie chunker
+            post_processor: Optional list -> list chunk post-processor (e.g. process_chunks)
+            config_hash: Chunker config hash (computed with chunker_config_hash if omitted)
+            version: Post-processor version (processor_version(post_processor) if omitted)
+
+        Returns:
+            Final chunk list; chunk objects are stored and returned as their text
+        """
+        config_hash = config_hash or chunker_config_hash(chunker)
+        version = version or processor_version(post_processor)
+        key = self.key(document, config_hash, version)
+
+        chunks = self.get(key)
+        if chunks is None:
+            chunks = [getattr(chunk, "text", chunk) for chunk in chunker(document)]
+            if post_processor is not None:
+                chunks = post_processor(chunks)
+            self.put(key, chunks)
+        return chunks
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Hit/miss counters for the current process and the size of the store.
+        """
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "bytes": self.total_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "writes": self.writes,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
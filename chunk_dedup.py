@@ -0,0 +1,196 @@
+import hashlib
+import re
+import zlib
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+def normalize_chunk(text: str) -> str:
+    """
+    Collapse whitespace so formatting-only differences hash the same.
+    """
+    return re.sub(r"\s+", " ", text).strip()
+
+def chunk_id(text: str) -> str:
+    """
+    Deterministic content-addressed ID of a final chunk.
+    """
+    return hashlib.blake2b(normalize_chunk(text).encode("utf-8"), digest_size=16).hexdigest()
+
+class ChunkDeduplicator:
+    """
+    Collapses identical chunks across documents.
+
+    Bank product pages repeat the same FD rate tables and disclaimers; each
+    distinct chunk is kept once, with the list of documents it came from.
+    """
+
+    def __init__(self):
+        self.chunks: Dict[str, dict] = {}  # chunk ID -> {"chunk_id", "text", "sources"}
+        self.total = 0
+
+    def add(self, text: str, source: Optional[str] = None) -> Tuple[str, bool]:
+        """
+        Add one chunk.
+
+        Returns:
+            tuple: (chunk ID, whether the chunk was new)
+        """
+        self.total += 1
+        key = chunk_id(text)
+        entry = self.chunks.get(key)
+        if entry is None:
+            self.chunks[key] = {"chunk_id": key, "text": text, "sources": [source] if source is not None else []}
+            return key, True
+        if source is not None and source not in entry["sources"]:
+            entry["sources"].append(source)
+        return key, False
+
+    def add_document(self, source: str, chunks: Iterable[str]) -> List[str]:
+        """
+        Add the post-processed chunks of one document and return their chunk IDs.
+        """
+        return [self.add(chunk, source)[0] for chunk in chunks]
+
+    def collapse_near_duplicates(self, threshold: float = 0.9, num_perm: int = 64, bands: int = 16) -> int:
+        """
+        Merge near-duplicate chunks into the first one seen, combining their sources.
+
+        Returns:
+            int: Number of chunks merged away
+        """
+        entries = list(self.chunks.values())
+        groups = near_duplicate_groups([entry["text"] for entry in entries], threshold, num_perm, bands)
+        merged = 0
+        for group in groups:
+            keeper = entries[group[0]]
+            for index in group[1:]:
+                duplicate = entries[index]
+                for source in duplicate["sources"]:
+                    if source not in keeper["sources"]:
+                        keeper["sources"].append(source)
+                keeper.setdefault("near_duplicates", []).append(duplicate["chunk_id"])
+                del self.chunks[duplicate["chunk_id"]]
+                merged += 1
+        return merged
+
+    def unique_chunks(self) -> List[dict]:
+        """
+        Distinct chunks in first-seen order, ready for embedding.
+        """
+        return list(self.chunks.values())
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "chunks_seen": self.total,
+            "unique_chunks": len(self.chunks),
+            "duplicates_removed": self.total - len(self.chunks)
+        }
+
+# Target size of each temporary array of a minhash_signatures batch
+BATCH_BYTES = 32 << 20
+
+def _shingle_hashes(text: str, shingle_size: int) -> np.ndarray:
+    words = normalize_chunk(text).lower().split(" ")
+    if len(words) <= shingle_size:
+        shingles = [" ".join(words)]
+    else:
+        shingles = [" ".join(words[i:i + shingle_size]) for i in range(len(words) - shingle_size + 1)]
+    return np.unique(np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingles), dtype=np.uint64))
+
+def minhash_signatures(
+    texts: List[str],
+    num_perm: int = 64,
+    shingle_size: int = 3,
+    seed: int = 0,
+    batch_shingles: Optional[int] = None
+) -> np.ndarray:
+    """
+    MinHash signatures of word shingles, computed for many texts at once.
+
+    Shingle hashes of a batch of texts are concatenated and all permutations are
+    applied with one broadcast multiply-shift; np.minimum.reduceat then takes the
+    per-text minimum.
+
+    Args:
+        texts: Chunk texts
+        num_perm: Number of permutations (signature length)
+        shingle_size: Words per shingle
+        seed: Seed of the permutations
+        batch_shingles: Shingles per batch; the (num_perm, batch_shingles) uint64
+            temporaries are sized to about BATCH_BYTES each by default
+
+    Returns:
+        np.ndarray: (len(texts), num_perm) uint32 signatures
+    """
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, 2 ** 63, size=(num_perm, 1), dtype=np.uint64) | np.uint64(1)
+    b = rng.integers(0, 2 ** 63, size=(num_perm, 1), dtype=np.uint64)
+
+    if batch_shingles is None:
+        batch_shingles = max(1, BATCH_BYTES // (8 * num_perm))
+
+    signatures = np.empty((len(texts), num_perm), dtype=np.uint32)
+    hashes = [_shingle_hashes(text, shingle_size) for text in texts]
+
+    start = 0
+    while start < len(texts):
+        end = start
+        size = 0
+        while end < len(texts) and (end == start or size + len(hashes[end]) <= batch_shingles):
+            size += len(hashes[end])
+            end += 1
+
+        batch = np.concatenate(hashes[start:end])
+        offsets = np.cumsum([0] + [len(h) for h in hashes[start:end - 1]])
+        with np.errstate(over="ignore"):
+            permuted = (a * batch + b) >> np.uint64(32)
+        signatures[start:end] = np.minimum.reduceat(permuted, offsets, axis=1).T
+        start = end
+
+    return signatures
+
+def near_duplicate_groups(
+    texts: List[str],
+    threshold: float = 0.9,
+    num_perm: int = 64,
+    bands: int = 16
+) -> List[List[int]]:
+    """
+    Group texts whose estimated Jaccard similarity reaches the threshold.
+
+    Candidate pairs come from LSH banding of the MinHash signatures and are then
+    checked against the full signature.
+
+    Returns:
+        list: Groups of text indices (first index first), only groups of two or more
+    """
+    if len(texts) < 2:
+        return []
+    signatures = minhash_signatures(texts, num_perm)
+    rows = num_perm // bands
+
+    parent = list(range(len(texts)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for band in range(bands):
+        buckets: Dict[bytes, int] = {}
+        band_signatures = np.ascontiguousarray(signatures[:, band * rows:(band + 1) * rows])
+        for i in range(len(texts)):
+            key = band_signatures[i].tobytes()
+            first = buckets.setdefault(key, i)
+            if first == i:
+                continue
+            root_first, root_i = find(first), find(i)
+            if root_first != root_i and np.mean(signatures[first] == signatures[i]) >= threshold:
+                parent[max(root_first, root_i)] = min(root_first, root_i)
+
+    groups: Dict[int, List[int]] = {}
+    for i in range(len(texts)):
+        groups.setdefault(find(i), []).append(i)
+    return [group for group in groups.values() if len(group) > 1]
@@ -0,0 +1,282 @@
+import io
+import json
+import mmap
+import os
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+
+BLOB_FILE = "chunks.bin"
+INDEX_FILE = "index.npy"
+STRINGS_FILE = "strings.json"
+
+# One row per chunk; strings (source document, section path) are stored once in
+# strings.json and referenced by position
+INDEX_DTYPE = np.dtype([
+    ("offset", np.int64),
+    ("length", np.int32),
+    ("token_count", np.int32),
+    ("table_id", np.int64),
+    ("source_id", np.int32),
+    ("section_id", np.int32),
+])
+
+def _section_key(section_path: Union[str, List[str], None]) -> Optional[str]:
+    if section_path is None:
+        return None
+    if isinstance(section_path, str):
+        return section_path
+    return " > ".join(section_path)
+
+def _read_index_header(f) -> Tuple[Tuple[int, ...], Tuple[int, int]]:
+    """
+    (shape, version) of an open .npy index, leaving f at the first row
+    """
+    version = np.lib.format.read_magic(f)
+    read_header = np.lib.format.read_array_header_1_0 if version == (1, 0) else np.lib.format.read_array_header_2_0
+    shape, fortran_order, dtype = read_header(f)
+    if dtype != INDEX_DTYPE or fortran_order or len(shape) != 1:
+        raise ValueError(f"Not a chunk store index: {f.name}")
+    return shape, version
+
+def _index_rows(path: str) -> int:
+    """
+    Number of rows of an index, read from its header only
+    """
+    with open(path, "rb") as f:
+        return _read_index_header(f)[0][0]
+
+def _append_index_rows(path: str, rows: np.ndarray, count: int) -> bool:
+    """
+    Append rows after the first count rows of an index in place.
+
+    The rows are written first and the header's row count last, so a crash in
+    between leaves the index at its previous length. np.save leaves room in the
+    header for the row count to grow; returns False if the new header would not
+    fit, in which case nothing is changed.
+    """
+    with open(path, "r+b") as f:
+        _, version = _read_index_header(f)
+        data_start = f.tell()
+        header = io.BytesIO()
+        write_header = np.lib.format.write_array_header_1_0 if version == (1, 0) else np.lib.format.write_array_header_2_0
+        write_header(header, {
+            "descr": np.lib.format.dtype_to_descr(INDEX_DTYPE),
+            "fortran_order": False,
+            "shape": (count + len(rows),)
+        })
+        if header.tell() != data_start:
+            return False
+
+        f.seek(data_start + count * INDEX_DTYPE.itemsize)
+        f.write(rows.tobytes())
+        f.truncate()
+        f.flush()
+        os.fsync(f.fileno())
+        f.seek(0)
+        f.write(header.getvalue())
+    return True
+
+class ChunkStoreWriter:
+    """
+    Append-only writer for a chunk store directory.
+
+    Chunk texts are appended to a single UTF-8 blob as they arrive; the new index
+    rows and the string tables are written when the writer is closed. Opening an
+    existing store appends to it without reading its index: the new rows are
+    written after the existing ones and only the row count in the index header
+    is updated.
+    """
+
+    def __init__(self, path: str):
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+
+        index_path = os.path.join(path, INDEX_FILE)
+        strings_path = os.path.join(path, STRINGS_FILE)
+        self.existing = _index_rows(index_path) if os.path.exists(index_path) else 0
+        self.rows = []
+
+        self.sources: List[str] = []
+        self.sections: List[str] = []
+        if os.path.exists(strings_path):
+            with open(strings_path) as f:
+                strings = json.load(f)
+            self.sources = strings["sources"]
+            self.sections = strings["sections"]
+        self.source_ids = {source: i for i, source in enumerate(self.sources)}
+        self.section_ids = {section: i for i, section in enumerate(self.sections)}
+
+        self.blob = open(os.path.join(path, BLOB_FILE), "ab")
+        self.offset = self.blob.tell()
+
+    def _intern(self, value: Optional[str], values: List[str], ids: Dict[str, int]) -> int:
+        if value is None:
+            return -1
+        if value not in ids:
+            ids[value] = len(values)
+            values.append(value)
+        return ids[value]
+
+    def append(
+        self,
+        text: str,
+        source: Optional[str] = None,
+        section_path: Union[str, List[str], None] = None,
+        table_id: int = -1,
+        token_count: int = -1
+    ) -> int:
+        """
+        Append one chunk and return its chunk ID.
+
+        Args:
+            text: Chunk text
+            source: Source document name
+            section_path: Section path as "H1 > H2" or a list of headings
+            table_id: ID of the table the chunk belongs to (table_context_refs.table_id_for), -1 if none
+            token_count: Token count of the chunk, -1 if unknown
+
+        Returns:
+            int: Chunk ID
+        """
+        data = text.encode("utf-8")
+        self.blob.write(data)
+        self.rows.append((
+            self.offset,
+            len(data),
+            token_count,
+            table_id,
+            self._intern(source, self.sources, self.source_ids),
+            self._intern(_section_key(section_path), self.sections, self.section_ids),
+        ))
+        self.offset += len(data)
+        return self.existing + len(self.rows) - 1
+
+    def extend(self, chunks: Iterable[Union[str, dict]], source: Optional[str] = None, **metadata) -> List[int]:
+        """
+        Append chunks as they come out of a post-processor (list or generator).
+
+        Chunks may be texts, or dicts with a "text" and optional "section_path",
+        "table_id" and "token_count" keys such as those yielded by
+        iter_processed_chunks(..., return_metadata=True); other keys are ignored.
+
+        Returns:
+            list: Chunk IDs of the appended chunks
+        """
+        chunk_ids = []
+        for chunk in chunks:
+            if isinstance(chunk, dict):
+                fields = {key: chunk[key] for key in ("section_path", "table_id", "token_count") if key in chunk}
+                chunk_ids.append(self.append(chunk["text"], source=source, **dict(metadata, **fields)))
+            else:
+                chunk_ids.append(self.append(chunk, source=source, **metadata))
+        return chunk_ids
+
+    def close(self):
+        """
+        Flush the blob, then write the string tables and the new index rows.
+        """
+        self.blob.close()
+
+        tmp_strings = os.path.join(self.path, STRINGS_FILE + ".tmp")
+        with open(tmp_strings, "w") as f:
+            json.dump({"sources": self.sources, "sections": self.sections}, f)
+        os.replace(tmp_strings, os.path.join(self.path, STRINGS_FILE))
+
+        rows = np.array(self.rows, dtype=INDEX_DTYPE)
+        index_path = os.path.join(self.path, INDEX_FILE)
+        if not os.path.exists(index_path) or not _append_index_rows(index_path, rows, self.existing):
+            existing = np.load(index_path) if os.path.exists(index_path) else np.zeros(0, INDEX_DTYPE)
+            tmp_index = os.path.join(self.path, "index.tmp.npy")
+            np.save(tmp_index, np.concatenate([existing[:self.existing], rows]))
+            os.replace(tmp_index, index_path)
+        self.existing += len(self.rows)
+        self.rows = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+class ChunkStore:
+    """
+    Read-only, memory-mapped view of a chunk store directory.
+
+    Opening a store maps the blob and the index without reading them, so loading
+    is independent of the number of chunks. Texts are decoded on access only.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.index = np.load(os.path.join(path, INDEX_FILE), mmap_mode="r")
+        with open(os.path.join(path, STRINGS_FILE)) as f:
+            strings = json.load(f)
+        self.sources = strings["sources"]
+        self.sections = strings["sections"]
+
+        self._file = open(os.path.join(path, BLOB_FILE), "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else None
+        self.blob = memoryview(self._mmap) if self._mmap is not None else memoryview(b"")
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def get_bytes(self, chunk_id: int) -> memoryview:
+        """
+        Zero-copy slice of the chunk's UTF-8 bytes.
+
+        The slice borrows the store's mapping: release it (view.release(), or
+        drop it) before closing the store, and copy it with bytes() to keep the
+        data longer.
+        """
+        row = self.index[chunk_id]
+        offset = int(row["offset"])
+        return self.blob[offset:offset + int(row["length"])]
+
+    def __getitem__(self, chunk_id: int) -> str:
+        return str(self.get_bytes(chunk_id), "utf-8")
+
+    def get_many(self, chunk_ids: Iterable[int]) -> List[str]:
+        """
+        Texts of several chunks, e.g. to build the rerank endpoint's documents.
+        """
+        return [self[int(chunk_id)] for chunk_id in chunk_ids]
+
+    def metadata(self, chunk_id: int) -> dict:
+        """
+        Metadata of one chunk.
+        """
+        row = self.index[chunk_id]
+        source_id = int(row["source_id"])
+        section_id = int(row["section_id"])
+        return {
+            "chunk_id": int(chunk_id),
+            "source": self.sources[source_id] if source_id >= 0 else None,
+            "section_path": self.sections[section_id] if section_id >= 0 else None,
+            "table_id": int(row["table_id"]),
+            "token_count": int(row["token_count"]),
+        }
+
+    def __iter__(self) -> Iterator[str]:
+        for chunk_id in range(len(self)):
+            yield self[chunk_id]
+
+    def close(self):
+        """
+        Unmap the store; raises BufferError while slices from get_bytes() are alive.
+        """
+        self.blob.release()
+        if self._mmap is not None:
+            try:
+                self._mmap.close()
+            except BufferError:
+                raise BufferError("Release the memoryviews returned by get_bytes() before closing the chunk store") from None
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -1,17 +1,16 @@
+from markdown_scanner import iter_tables
+
 def find_first_table(lines):
-    for i in range(len(lines) - 1):
-        if lines[i].startswith('|') and lines[i+1].startswith('|') and '---' in lines[i+1]:
-            # Found potential header and separator
-            header_line = lines[i]
-            separator_line = lines[i+1]
-            # Find the end of the table
-            j = i + 2
-            while j < len(lines) and lines[j].startswith('|'):
-                j += 1
-            table_body = lines[i:j]
-            description_lines = lines[:i]
-            remaining_lines = lines[j:]
-            return (description_lines, header_line, separator_line, table_body, remaining_lines)
+    # Scan the joined lines once instead of testing them one by one
+    text = '\n'.join(lines)
+    for start, header_end, separator_end, end in iter_tables(text):
+        # Found header and separator; map offsets back to line numbers
+        i = text.count('\n', 0, start)
+        j = i + 2 + text.count('\n', separator_end, end)
+        table_body = lines[i:j]
+        description_lines = lines[:i]
+        remaining_lines = lines[j:]
+        return (description_lines, lines[i], lines[i+1], table_body, remaining_lines)
     return None
 
 def process_chunks(chunks):
@@ -24,68 +23,25 @@ def process_chunks(chunks):
         # Check if this chunk is a continuation of the previous table
         if current_table and lines and lines[0].startswith('|') and not any('---' in line for line in lines[:2]):
             # Prepend the previous table's description, header, and separator
-            new_lines = current_table['description'] + [current_table['header'], current_table['separator']] + lines
-            tables = []
-            remaining = new_lines
-            while True:
-                result = find_first_table(remaining)
-                if not result:
-                    break
-                desc, header, sep, body, remaining = result
-                tables.append((desc, header, sep, body))
-            
-            # Rebuild the processed lines
-            processed_lines = []
-            for desc, header, sep, body in tables:
-                processed_lines.extend(desc)
-                processed_lines.append(header)
-                processed_lines.append(sep)
-                processed_lines.extend(body[2:])  # Skip header and separator as they are already added
-            processed_lines.extend(remaining)
-            
-            # Update current_table with the last table in this chunk
-            if tables:
-                last_desc, last_header, last_sep, last_body = tables[-1]
-                current_table = {
-                    'description': last_desc,
-                    'header': last_header,
-                    'separator': last_sep
-                }
-            else:
-                current_table = None
-            
-            processed_chunks.append('\n'.join(processed_lines))
-        else:
-            # Process the chunk normally
-            tables = []
-            remaining = lines
-            while True:
-                result = find_first_table(remaining)
-                if not result:
-                    break
-                desc, header, sep, body, remaining = result
-                tables.append((desc, header, sep, body))
-            
-            # Rebuild the processed lines
-            processed_lines = []
-            for desc, header, sep, body in tables:
-                processed_lines.extend(desc)
-                processed_lines.append(header)
-                processed_lines.append(sep)
-                processed_lines.extend(body[2:])  # Skip header and separator
-            processed_lines.extend(remaining)
-            
-            # Update current_table with the last table in this chunk
-            if tables:
-                last_desc, last_header, last_sep, last_body = tables[-1]
-                current_table = {
-                    'description': last_desc,
-                    'header': last_header,
-                    'separator': last_sep
-                }
-            else:
-                current_table = None
-            
-            processed_chunks.append('\n'.join(processed_lines))
+            lines = current_table['description'] + [current_table['header'], current_table['separator']] + lines
+        
+        # Tables stay where they are, so the chunk text is final; only the
+        # last table (and the lines since the table before it) is carried over
+        text = '\n'.join(lines)
+        current_table = None
+        description_start = 0
+        for start, header_end, separator_end, end in iter_tables(text):
+            current_table = {
+                'description': text[description_start:start].split('\n')[:-1],
+                'header': text[start:header_end],
+                'separator': text[header_end + 1:separator_end]
+            }
+            description_start = end + 1
+        
+        processed_chunks.append(text)
     
-    return processed_chunks
\ No newline at end of file
+    return processed_chunks
+
+# Output version for chunk caches (chunk_cache.processor_version); bump it whenever
+# process_chunks or the markdown_scanner helpers change what it produces
+process_chunks.__version__ = "deepseek-example/1"
@@ -1,108 +1,303 @@
 import re
 
 # ------------------------------
-# Table Handling (Original Logic)
+# Line Classification
 # ------------------------------
-def find_first_table(lines):
-    for i in range(len(lines) - 1):
-        if lines[i].startswith('|') and lines[i+1].startswith('|') and '---' in lines[i+1]:
+def is_list_item(line):
+    return re.match(r'^(\s*[-*+]|\s*\d+\.)\s+', line) is not None
+
+def parse_heading(line):
+    """Return (level, title) for a markdown heading line, otherwise None"""
+    match = re.match(r'^(#{1,6})\s+(.*?)\s*#*\s*$', line.strip())
+    if not match:
+        return None
+    return len(match.group(1)), match.group(2)
+
+def line_kind(line):
+    """Kind of a line outside code fences: 'table_separator', 'table', 'heading', 'list' or 'text'"""
+    if line.startswith('|'):
+        return 'table_separator' if '---' in line else 'table'
+    if parse_heading(line):
+        return 'heading'
+    if is_list_item(line):
+        return 'list'
+    return 'text'
+
+def classify_lines(lines, in_fence=False):
+    """
+    Classify every line of a chunk once, for all context trackers to share.
+
+    Kinds: 'fence', 'code', and the kinds of line_kind.
+    Lines inside a fenced code block are 'code', whatever they look like.
+
+    Returns the kinds and whether the chunk ends inside a code fence.
+    """
+    kinds = []
+    for line in lines:
+        if line.lstrip().startswith('```'):
+            kinds.append('fence')
+            in_fence = not in_fence
+        elif in_fence:
+            kinds.append('code')
+        else:
+            kinds.append(line_kind(line))
+    return kinds, in_fence
+
+# ------------------------------
+# Carried-Over Context
+# ------------------------------
+def continues_table(table, lines):
+    """Whether a chunk starts with table rows that need the previous chunk's table header"""
+    return bool(table and lines and lines[0].startswith('|') and not any('---' in line for line in lines[:2]))
+
+def table_context(lines, kinds):
+    """
+    Description, header and separator of the last table in a chunk, or None
+
+    A table is a header row followed by a separator row; its description is
+    the lines between the end of the previous table and its header.
+    """
+    table = None
+    description_start = 0
+    i = 0
+    while i < len(lines) - 1:
+        if kinds[i] in ('table', 'table_separator') and kinds[i + 1] == 'table_separator':
             j = i + 2
-            while j < len(lines) and lines[j].startswith('|'):
+            while j < len(lines) and kinds[j] in ('table', 'table_separator'):
                 j += 1
-            return (lines[:i], lines[i], lines[i+1], lines[i:j], lines[j:])
-    return None
+            table = {
+                'description': lines[description_start:i],
+                'description_kinds': kinds[description_start:i],
+                'header': lines[i],
+                'separator': lines[i + 1]
+            }
+            description_start = i = j
+        else:
+            i += 1
+    return table
 
+def list_context(lines, kinds):
+    """
+    Lines introducing a list left open at the end of a chunk, or None
+
+    The introduction runs back from the list to the previous list or table
+    line, and stops after a heading.
+    """
+    if not kinds or kinds[-1] != 'list':
+        return None
+    start = len(kinds) - 1
+    while start > 0 and kinds[start - 1] == 'list':
+        start -= 1
+    intro = start
+    while intro > 0 and kinds[intro - 1] not in ('list', 'table', 'table_separator'):
+        intro -= 1
+        if kinds[intro] == 'heading':
+            break
+    return {'description': lines[intro:start], 'description_kinds': kinds[intro:start]}
+
+def update_heading_stack(stack, lines, kinds=None):
+    """
+    Push the headings found in lines onto the heading stack, popping any heading
+    of the same or a deeper level first.
+
+    Returns the section path of the chunk (the path in effect at its first
+    non-heading line) and how many of its entries were inherited from earlier chunks.
+    With kinds (see classify_lines), only lines of kind 'heading' are headings.
+    """
+    inherited = len(stack)
+    section_path = None
+    for i, line in enumerate(lines):
+        heading = parse_heading(line) if kinds is None or kinds[i] == 'heading' else None
+        if heading is None:
+            if section_path is None:
+                section_path = [title for _, title in stack]
+            continue
+        level, title = heading
+        while stack and stack[-1][0] >= level:
+            stack.pop()
+        if section_path is None:
+            inherited = min(inherited, len(stack))
+        stack.append((level, title))
+    if section_path is None:
+        section_path = [title for _, title in stack]
+    return section_path, min(inherited, len(section_path))
+
+# ------------------------------
+# Table Handling (Original Logic)
+# ------------------------------
 def process_tables(chunks):
     current_table = None  # Tracks table headers/descriptions
     processed_chunks = []
     
     for chunk in chunks:
         lines = [line.strip() for line in chunk.split('\n') if line.strip()]
-        if current_table and lines and lines[0].startswith('|') and not any('---' in line for line in lines[:2]):
-            new_lines = current_table['description'] + [current_table['header'], current_table['separator']] + lines
-            processed, current_table = _rebuild_table_content(new_lines)
-            processed_chunks.append('\n'.join(processed))
-        else:
-            processed, current_table = _rebuild_table_content(lines)
-            processed_chunks.append('\n'.join(processed))
+        if continues_table(current_table, lines):
+            lines = current_table['description'] + [current_table['header'], current_table['separator']] + lines
+        current_table = table_context(lines, [line_kind(line) for line in lines])
+        processed_chunks.append('\n'.join(lines))
     
     return processed_chunks
 
-def _rebuild_table_content(lines):
-    tables = []
-    remaining = lines.copy()
-    current_table = None
-    
-    while True:
-        result = find_first_table(remaining)
-        if not result:
-            break
-        desc, header, sep, body, remaining = result
-        tables.append((desc, header, sep, body))
-    
-    processed = []
-    for desc, header, sep, body in tables:
-        processed.extend(desc)
-        processed.append(header)
-        processed.append(sep)
-        processed.extend(body[2:])
-    
-    if tables:
-        last_desc, last_header, last_sep, last_body = tables[-1]
-        current_table = {'description': last_desc, 'header': last_header, 'separator': last_sep}
-    else:
-        current_table = None
-    
-    processed.extend(remaining)
-    return processed, current_table
-
 # ------------------------------
 # Section Header Handling (New)
 # ------------------------------
-def is_list_item(line):
-    return re.match(r'^(\s*[-*+]|\s*\d+\.)\s+', line) is not None
+def process_sections(chunks, breadcrumbs=False, return_metadata=False):
+    """
+    Carry list descriptions across chunks and track the heading hierarchy.
 
-def process_sections(chunks):
-    current_section = None  # Tracks {'description': [], 'is_active': bool}
+    Args:
+        chunks (list): Chunk texts
+        breadcrumbs (bool): Prefix each chunk with the inherited part of its
+            section path (e.g. "Fixed Deposits > Rates") when that context is
+            not already present in the chunk
+        return_metadata (bool): Return dicts with the chunk text and its
+            section_path (list of headings, H1 first) instead of plain texts
+
+    Returns:
+        list: Processed chunks
+    """
+    current_section = None  # Tracks {'description': [], 'description_kinds': []}
+    heading_stack = []  # (level, title) of the open headings
     processed_chunks = []
     
     for chunk in chunks:
         lines = [line.rstrip() for line in chunk.split('\n') if line.strip()]
+        kinds = [line_kind(line) for line in lines]
         
         # Check if chunk continues a previous section's list
-        if current_section and lines and is_list_item(lines[0]):
+        if current_section and kinds and kinds[0] == 'list':
             lines = current_section['description'] + lines
-            current_section['is_active'] = True  # Assume continuation until proven otherwise
-        else:
-            current_section = None
+            kinds = current_section['description_kinds'] + kinds
         
-        # Detect new section headers with lists
-        new_section = None
-        for i, line in enumerate(lines):
-            if is_list_item(line):
-                header_lines = [l for l in lines[:i] if i > 0 else []
-                new_section = {
-                    'description': header_lines,
-                    'is_active': any(is_list_item(l) for l in lines[i:])
-                }
-                break
+        # Track headings, including any description carried over from the previous chunk
+        section_path, inherited = update_heading_stack(heading_stack, lines, kinds)
         
-        if new_section:
-            current_section = new_section
+        # Detect a list still open at the end of the chunk, with the lines introducing it
+        current_section = list_context(lines, kinds)
         
-        processed_chunks.append('\n'.join(lines))
+        text = '\n'.join(lines)
+        if breadcrumbs and inherited:
+            text = ' > '.join(section_path[:inherited]) + '\n' + text
+        
+        if return_metadata:
+            processed_chunks.append({'text': text, 'section_path': section_path})
+        else:
+            processed_chunks.append(text)
     
     return processed_chunks
 
+# ------------------------------
+# Fused Single-Pass Pipeline
+# ------------------------------
+class CodeFenceTracker:
+    """Re-opens a code fence left open by the previous chunk"""
+
+    def __init__(self):
+        self.open_fence = None
+
+    def process(self, state):
+        lines, kinds = state['lines'], state['kinds']
+        if self.open_fence:
+            lines.insert(0, self.open_fence)
+            kinds.insert(0, 'fence')
+            state['metadata']['in_code_block'] = True
+        for line, kind in zip(lines, kinds):
+            if kind == 'fence':
+                self.open_fence = None if self.open_fence else line
+
+class TableTracker:
+    """Carries the description, header and separator of the last table (see process_tables)"""
+
+    def __init__(self):
+        self.current_table = None
+
+    def process(self, state):
+        lines, kinds = state['lines'], state['kinds']
+        if kinds and kinds[0] == 'table' and continues_table(self.current_table, lines):
+            table = self.current_table
+            lines[:0] = table['description'] + [table['header'], table['separator']]
+            kinds[:0] = table['description_kinds'] + ['table', 'table_separator']
+        self.current_table = table_context(lines, kinds)
+
+class ListTracker:
+    """Carries the description of a list left open by the previous chunk (see process_sections)"""
+
+    def __init__(self):
+        self.current_section = None
+
+    def process(self, state):
+        lines, kinds = state['lines'], state['kinds']
+        if self.current_section and kinds and kinds[0] == 'list':
+            lines[:0] = self.current_section['description']
+            kinds[:0] = self.current_section['description_kinds']
+        self.current_section = list_context(lines, kinds)
+
+class HeadingTracker:
+    """Tracks the heading stack and attaches the section path (see update_heading_stack)"""
+
+    def __init__(self, breadcrumbs=False):
+        self.breadcrumbs = breadcrumbs
+        self.stack = []
+
+    def process(self, state):
+        section_path, inherited = update_heading_stack(self.stack, state['lines'], state['kinds'])
+        state['metadata']['section_path'] = section_path
+        if self.breadcrumbs and inherited:
+            state['prefix'] = ' > '.join(section_path[:inherited])
+
+def default_trackers(breadcrumbs=False):
+    return [CodeFenceTracker(), TableTracker(), ListTracker(), HeadingTracker(breadcrumbs)]
+
+def iter_processed_chunks(chunks, trackers=None, return_metadata=False):
+    """
+    Single-pass chunk post-processing.
+
+    Each chunk is split and classified once; every tracker then updates its own
+    context from the shared line kinds and may prepend carried-over context, at a
+    constant cost per line. Chunks are consumed and yielded lazily, so this can sit
+    directly behind a streaming chunker.
+
+    Args:
+        chunks (iterable): Chunk texts
+        trackers (list): Context trackers, applied in order (default_trackers() if None)
+        return_metadata (bool): Yield dicts with the text and the trackers' metadata
+
+    Yields:
+        Processed chunk texts, or dicts when return_metadata is set
+    """
+    if trackers is None:
+        trackers = default_trackers()
+    in_fence = False
+
+    for chunk in chunks:
+        lines = [line.rstrip() for line in chunk.split('\n') if line.strip()]
+        kinds, ends_in_fence = classify_lines(lines, in_fence)
+        lines = [line if kind == 'code' else line.strip() for line, kind in zip(lines, kinds)]
+        in_fence = ends_in_fence
+
+        state = {'lines': lines, 'kinds': kinds, 'metadata': {}, 'prefix': None}
+        for tracker in trackers:
+            tracker.process(state)
+
+        text = '\n'.join(state['lines'])
+        if state['prefix']:
+            text = state['prefix'] + '\n' + text
+
+        if return_metadata:
+            yield {'text': text, **state['metadata']}
+        else:
+            yield text
+
 # ------------------------------
 # Combined Processing
 # ------------------------------
-def process_all_chunks(chunks):
-    # First process tables
-    table_processed = process_tables(chunks)
-    # Then process section headers
-    final_chunks = process_sections(table_processed)
-    return final_chunks
+def process_all_chunks(chunks, breadcrumbs=False, return_metadata=False):
+    # Tables, lists and section headers in one pass
+    return list(iter_processed_chunks(chunks, default_trackers(breadcrumbs), return_metadata))
+
+# Output version for chunk caches (chunk_cache.processor_version); bump it whenever
+# the trackers or line classification change what process_all_chunks produces
+process_all_chunks.__version__ = "deepseek_detect_sections/1"
 
 # ------------------------------
 # Example Usage
@@ -127,6 +322,7 @@ chunk2 = """|371 days |7.50% |
 chunk3 = """- Benefit 3: Tax savings
 - Benefit 4: Senior citizen perks"""
 
-final_chunks = process_all_chunks([chunk1, chunk2, chunk3])
-for i, chunk in enumerate(final_chunks):
-    print(f"Processed Chunk {i+1}:\n{chunk}\n{'-'*50}\n")
\ No newline at end of file
+if __name__ == "__main__":
+    final_chunks = process_all_chunks([chunk1, chunk2, chunk3], breadcrumbs=True, return_metadata=True)
+    for i, chunk in enumerate(final_chunks):
+        print(f"Processed Chunk {i+1} ({' > '.join(chunk['section_path'])}):\n{chunk['text']}\n{'-'*50}\n")
\ No newline at end of file
@@ -0,0 +1,87 @@
+import argparse
+import json
+import time
+
+from script_helpers import load_handler
+
+def load_requests(path):
+    """
+    Read rerank requests (query, documents, top_k) from a JSONL file
+    """
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def timed_predict(handler, model, request):
+    """
+    Run predict_fn and return (result, seconds)
+    """
+    start = time.perf_counter()
+    result = handler.predict_fn(request, model)
+    return result, time.perf_counter() - start
+
+def evaluate_adaptive_scoring(handler, model, requests, cheap_tokens, rescore_band=None):
+    """
+    Compare adaptive scoring against full-length scoring on the same requests
+
+    Args:
+        handler: Loaded inference module
+        model: Model returned by handler.model_fn
+        requests (list): Request payloads in the test_endpoint shape
+        cheap_tokens (int): Length of the adaptive first pass
+        rescore_band (int): Documents rescored on each side of the cutoff (defaults to top_k)
+
+    Returns:
+        dict: Ranking agreement and latency of both modes
+    """
+    overlap = 0.0
+    exact = 0
+    upgraded = 0
+    pairs = 0
+    full_seconds = []
+    adaptive_seconds = []
+
+    for request in requests:
+        base = dict(request, return_documents=False)
+        full, full_time = timed_predict(handler, model, dict(base, mode="truncate"))
+        adaptive_request = dict(base, mode="adaptive", cheap_tokens=cheap_tokens)
+        if rescore_band is not None:
+            adaptive_request["rescore_band"] = rescore_band
+        adaptive, adaptive_time = timed_predict(handler, model, adaptive_request)
+
+        full_ranking = [result["index"] for result in full["results"]]
+        adaptive_ranking = [result["index"] for result in adaptive["results"]]
+        overlap += len(set(full_ranking) & set(adaptive_ranking)) / max(1, len(full_ranking))
+        exact += full_ranking == adaptive_ranking
+        upgraded += adaptive["stats"]["upgraded_pairs"]
+        pairs += len(request["documents"])
+        full_seconds.append(full_time)
+        adaptive_seconds.append(adaptive_time)
+
+    count = len(requests)
+    return {
+        "requests": count,
+        "cheap_tokens": cheap_tokens,
+        "top_k_overlap": overlap / count,
+        "exact_order_match": exact / count,
+        "upgraded_pair_fraction": upgraded / max(1, pairs),
+        "full_mean_ms": 1000 * sum(full_seconds) / count,
+        "adaptive_mean_ms": 1000 * sum(adaptive_seconds) / count,
+        "speedup": sum(full_seconds) / max(sum(adaptive_seconds), 1e-9)
+    }
+
+# Example usage
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare adaptive and full-length rerank scoring offline")
+    parser.add_argument("requests", help="JSONL file of {query, documents, top_k} requests")
+    parser.add_argument("--model-dir", default="/opt/ml/model", help="Directory passed to model_fn")
+    parser.add_argument("--cheap-tokens", type=int, nargs="+", default=[64, 96, 128])
+    parser.add_argument("--rescore-band", type=int, default=None)
+    args = parser.parse_args()
+
+    handler = load_handler()
+    model = handler.model_fn(args.model_dir)
+    requests = load_requests(args.requests)
+
+    for cheap_tokens in args.cheap_tokens:
+        report = evaluate_adaptive_scoring(handler, model, requests, cheap_tokens, args.rescore_band)
+        print(json.dumps(report, indent=2))
@@ -0,0 +1,112 @@
+import argparse
+import glob
+import json
+import os
+import time
+
+import numpy as np
+
+from script_helpers import load_script
+from token_estimator import TokenEstimator
+
+def read_corpus(paths):
+    """
+    Texts of markdown files, given as files, directories or glob patterns
+    """
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(glob.glob(os.path.join(path, "**", "*.md"), recursive=True)))
+        else:
+            files.extend(sorted(glob.glob(path)))
+    texts = []
+    for file in files:
+        with open(file, encoding="utf-8") as f:
+            texts.append(f.read())
+    return texts
+
+def chunk_report(chunks, chunk_size, count_tokens_batch, seconds):
+    """
+    Size statistics of a chunking run, with chunk sizes counted exactly
+    """
+    tokens = np.asarray(count_tokens_batch(chunks), dtype=np.int64) if chunks else np.zeros(1, dtype=np.int64)
+    over = tokens > chunk_size
+    return {
+        "seconds": seconds,
+        "chunks": len(chunks),
+        "over_budget": int(over.sum()),
+        "over_budget_rate": float(over.mean()),
+        "max_tokens": int(tokens.max()),
+        "mean_fill": float(np.mean(np.minimum(tokens, chunk_size)) / chunk_size)
+    }
+
+def evaluate_token_estimates(texts, make_chunker, calibration_texts=None, quantile=0.999):
+    """
+    Chunk a corpus with exact and with estimated token counts and compare
+
+    Args:
+        texts (list): Documents to chunk
+        make_chunker (callable): Returns a new, identically configured RecursiveChunker
+        calibration_texts (list): Documents to calibrate on (defaults to texts)
+        quantile (float): Calibration quantile of the exact/estimated ratio range
+
+    Returns:
+        dict: Calibration, per-run timings and chunk size statistics (chunks over
+        chunk_size, largest chunk, mean fill), the share of span counts that
+        needed the tokenizer, and the speedup
+    """
+    exact_chunker = make_chunker()
+    chunk_size = exact_chunker.chunk_size
+    count_tokens_batch = exact_chunker.tokenizer.count_tokens_batch
+
+    estimator = TokenEstimator(count_tokens_batch)
+    calibration = estimator.calibrate(calibration_texts or texts, span_tokens=chunk_size, quantile=quantile)
+    approximate_chunker = estimator.attach(make_chunker())
+
+    start = time.perf_counter()
+    exact_chunks = [chunk for text in texts for chunk in exact_chunker(text)]
+    exact_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    approximate_chunks = [chunk for text in texts for chunk in approximate_chunker(text)]
+    approximate_seconds = time.perf_counter() - start
+
+    texts_of = lambda chunks: [getattr(chunk, "text", chunk) for chunk in chunks]
+    return {
+        "documents": len(texts),
+        "characters": sum(map(len, texts)),
+        "chunk_size": chunk_size,
+        "calibration": calibration,
+        "exact": chunk_report(texts_of(exact_chunks), chunk_size, count_tokens_batch, exact_seconds),
+        "approximate": dict(
+            chunk_report(texts_of(approximate_chunks), chunk_size, count_tokens_batch, approximate_seconds),
+            **estimator.stats()
+        ),
+        "speedup": exact_seconds / max(approximate_seconds, 1e-9)
+    }
+
+# Example usage
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Validate estimated token counts against exact counting for the chunker")
+    parser.add_argument("corpus", nargs="+", help="Markdown files, directories or glob patterns")
+    parser.add_argument("--calibration-documents", type=int, default=None, help="Calibrate on the first N documents only")
+    parser.add_argument("--quantile", type=float, default=0.999)
+    parser.add_argument("--save-calibration", default=None, help="Write the fitted calibration as JSON")
+    args = parser.parse_args()
+
+    # Same rules, chunk size and tokenizer as the pipeline
+    pipeline = load_script("optimized-chunking-rules.py")
+    make_chunker = lambda: pipeline.RecursiveChunker(
+        tokenizer_or_token_counter=pipeline.chunker.tokenizer.tokenizer,
+        rules=pipeline.rules,
+        chunk_size=pipeline.chunker.chunk_size
+    )
+
+    texts = read_corpus(args.corpus)
+    calibration_texts = texts[:args.calibration_documents] if args.calibration_documents else None
+    report = evaluate_token_estimates(texts, make_chunker, calibration_texts, args.quantile)
+    print(json.dumps(report, indent=2))
+
+    if args.save_calibration:
+        with open(args.save_calibration, "w") as f:
+            json.dump(report["calibration"], f)
@@ -1,4 +1,6 @@
-def process_chunks(chunks):
+from table_context_refs import add_table_context
+
+def process_chunks(chunks, context_store=None):
     """
     Process markdown chunks to ensure table parts maintain their context.
     
@@ -12,6 +14,10 @@ def process_chunks(chunks):
     
     Args:
         chunks (list): List of string chunks from a markdown file
+        context_store (dict): Optional table ID -> context dictionary. When given,
+            the title/header/separator of a continued table is recorded there once
+            and the chunk carries a reference line instead (materialize it with
+            table_context_refs.materialize_table_context before embedding)
         
     Returns:
         list: Processed chunks with table headers added where needed
@@ -140,6 +146,10 @@ def process_chunks(chunks):
                     # Add header and separator
                     enhanced_chunk += active_table['header'] + "\n" + active_table['separator'] + "\n"
                     
+                    # Store the context once and reference it instead of copying it
+                    if context_store is not None:
+                        enhanced_chunk = add_table_context(enhanced_chunk[:-1], context_store) + "\n"
+                    
                     # Add table content up to where new tables start (if any)
                     if new_tables_after_continuation:
                         # Only include lines up to where the next table starts
@@ -170,4 +180,8 @@ def process_chunks(chunks):
         # 2. This chunk doesn't continue or start any tables
         processed_chunks.append(chunk)
     
-    return processed_chunks
\ No newline at end of file
+    return processed_chunks
+
+# Output version for chunk caches (chunk_cache.processor_version); bump it whenever
+# process_chunks or the table_context_refs helpers change what it produces
+process_chunks.__version__ = "fully-fixed-table-processor/2"
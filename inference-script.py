@@ -1,24 +1,107 @@
 import os
+import gc
 import json
+import heapq
+import hashlib
+import itertools
+import queue
+import threading
+import time
+from collections import OrderedDict, deque
+import numpy as np
 import torch
 from mxbai_rerank import MxbaiRerankV2
+from transformers import DynamicCache
 
 # Load the model once when the container starts
 model = None
 device = "cuda" if torch.cuda.is_available() else "cpu"
 
+# Sequence length and per-request token budget
+MAX_SEQUENCE_LENGTH = int(os.environ.get("MAX_SEQUENCE_LENGTH", "512"))
+MAX_REQUEST_TOKENS = int(os.environ.get("MAX_REQUEST_TOKENS", "0"))  # 0 disables the budget
+REQUEST_TOKEN_POLICY = os.environ.get("REQUEST_TOKEN_POLICY", "split")  # "split" or "reject"
+TRUNCATION_CACHE_SIZE = int(os.environ.get("TRUNCATION_CACHE_SIZE", "10000"))
+
+# Adaptive mode: length of the cheap first pass
+ADAPTIVE_CHEAP_TOKENS = int(os.environ.get("ADAPTIVE_CHEAP_TOKENS", "96"))
+
+# Score pairs with packed tensors instead of model.rank, and pairs per forward pass
+VECTORIZED_SCORING = os.environ.get("VECTORIZED_SCORING", "1") == "1"
+SCORING_BATCH_SIZE = int(os.environ.get("SCORING_BATCH_SIZE", "32"))
+
+# Vectorized scoring only: encode the shared query prefix once per request
+PREFIX_CACHE_SCORING = os.environ.get("PREFIX_CACHE_SCORING", "1") == "1"
+
+# Vectorized scoring only: overlap tokenization with the model for requests of at least this many pairs
+PIPELINE_MIN_PAIRS = int(os.environ.get("PIPELINE_MIN_PAIRS", "256"))
+PIPELINE_QUEUE_SIZE = int(os.environ.get("PIPELINE_QUEUE_SIZE", "2"))
+
+# Optional second, smaller model and the number of queued base requests before falling back to it
+SMALL_MODEL_NAME = os.environ.get("SMALL_MODEL_NAME")
+ROUTE_MAX_QUEUE = int(os.environ.get("ROUTE_MAX_QUEUE", "4"))
+
+# Admission control: budget of estimated tokens in flight per process (0 disables it)
+ADMISSION_MAX_COST = int(os.environ.get("ADMISSION_MAX_COST", "0"))
+ADMISSION_BATCH_FRACTION = float(os.environ.get("ADMISSION_BATCH_FRACTION", "0.5"))
+ADMISSION_QUEUE_TIMEOUT_MS = int(os.environ.get("ADMISSION_QUEUE_TIMEOUT_MS", "200"))
+ESTIMATED_CHARS_PER_TOKEN = 4
+
+# Model hot-swap: allow {"swap_model": path} requests, and token lengths a new model is warmed on
+ALLOW_MODEL_SWAP = os.environ.get("ALLOW_MODEL_SWAP", "0") == "1"
+WARMUP_LENGTHS = [int(n) for n in os.environ.get("WARMUP_LENGTHS", "32,128,512").split(",") if n]
+
+# Optional retrieval stage: directory of indexed chunk stores, one per corpus (see ann_index.py)
+CORPUS_DIR = os.environ.get("CORPUS_DIR")
+corpora = {}
+
+# Upper bound on characters per token, used to avoid tokenizing text that will be cut anyway
+MAX_CHARS_PER_TOKEN = 16
+
+# Serializes use of the main model: the tokenizer is not thread-safe
+model_lock = threading.Lock()
+
+# Hosted models by route name ("base", and "small" when SMALL_MODEL_NAME is set)
+routes = OrderedDict()
+
+# (tokenizer, max_tokens, document) -> (truncated_text, token_count, was_truncated)
+_truncation_cache = OrderedDict()
+_truncation_cache_lock = threading.Lock()
+
+# One model swap at a time; swap_status reports the latest one and is
+# only read or written under _swap_status_lock
+_swap_lock = threading.Lock()
+_swap_status_lock = threading.Lock()
+swap_status = {"state": "idle"}
+
 def model_fn(model_dir):
     """
     Load the model for inference
     """
-    global model
+    global model, corpora
     
     # Get model name from environment variable or use default
     model_name = os.environ.get("MODEL_NAME", "mixedbread-ai/mxbai-rerank-base-v2")
     
     # Initialize the model
-    print(f"Loading model {model_name} on {device}")
-    model = MxbaiRerankV2(model_name, device=device)
+    print(f"Loading model {model_name} on {device} (max_length={MAX_SEQUENCE_LENGTH})")
+    model = MxbaiRerankV2(model_name, device=device, max_length=MAX_SEQUENCE_LENGTH)
+    routes["base"] = ModelRoute("base", model, model_lock)
+    
+    # Host a smaller model next to it for requests the base model cannot serve in time
+    if SMALL_MODEL_NAME:
+        print(f"Loading small model {SMALL_MODEL_NAME} on {device}")
+        small_model = MxbaiRerankV2(SMALL_MODEL_NAME, device=device, max_length=MAX_SEQUENCE_LENGTH)
+        routes["small"] = ModelRoute("small", small_model)
+        for route in routes.values():
+            route.calibrate()
+            print(f"Route {route.name}: {route.ms_per_token:.4f} ms/token")
+    
+    # Only deployments with a corpus directory need the retrieval module next to this script
+    if CORPUS_DIR:
+        from ann_index import load_corpora
+        corpora = load_corpora(CORPUS_DIR)
+        print(f"Loaded corpora: {', '.join(corpora) or 'none'}")
     
     return model
 
@@ -32,24 +115,1203 @@ def input_fn(request_body, request_content_type):
     else:
         raise ValueError(f"Unsupported content type: {request_content_type}")
 
-def predict_fn(input_data, model):
+def count_tokens(text, tokenizer):
+    """
+    Count the tokens of a piece of text without special tokens
+    """
+    return len(tokenizer(text, add_special_tokens=False)["input_ids"])
+
+def truncate_documents(documents, max_tokens, tokenizer):
+    """
+    Pre-truncate documents to at most max_tokens tokens
+
+    Documents are tokenized in one batched call and cut at the character offset of
+    the last kept token, so the model only ever tokenizes text it will actually use.
+    Results are cached per document because the same chunks recur across requests.
+
+    Args:
+        documents (list): Document texts
+        max_tokens (int): Maximum number of tokens to keep per document
+        tokenizer: Fast tokenizer of the loaded model
+
+    Returns:
+        list: (text, token_count, was_truncated) tuples, one per document
+    """
+    entries = [None] * len(documents)
+    misses = []
+    with _truncation_cache_lock:
+        for i, document in enumerate(documents):
+            key = (tokenizer.name_or_path, max_tokens, document)
+            if key in _truncation_cache:
+                _truncation_cache.move_to_end(key)
+                entries[i] = _truncation_cache[key]
+            else:
+                misses.append(i)
+
+    if misses:
+        # Only the head of a long document can survive truncation
+        head_chars = max_tokens * MAX_CHARS_PER_TOKEN
+        heads = [documents[i][:head_chars] for i in misses]
+        encoded = tokenizer(
+            heads,
+            add_special_tokens=False,
+            truncation=True,
+            max_length=max_tokens,
+            return_offsets_mapping=True
+        )
+
+        for i, offsets in zip(misses, encoded["offset_mapping"]):
+            document = documents[i]
+            if len(offsets) < max_tokens and len(document) > head_chars:
+                # Unusually long tokens, fall back to tokenizing the whole document
+                offsets = tokenizer(
+                    document,
+                    add_special_tokens=False,
+                    truncation=True,
+                    max_length=max_tokens,
+                    return_offsets_mapping=True
+                )["offset_mapping"]
+
+            end = offsets[-1][1] if offsets else 0
+            was_truncated = bool(document[end:].strip())
+            entry = (document[:end] if was_truncated else document, len(offsets), was_truncated)
+
+            entries[i] = entry
+            with _truncation_cache_lock:
+                _truncation_cache[(tokenizer.name_or_path, max_tokens, document)] = entry
+                if len(_truncation_cache) > TRUNCATION_CACHE_SIZE:
+                    _truncation_cache.popitem(last=False)
+
+    return entries
+
+def split_by_token_budget(token_counts, budget):
+    """
+    Group consecutive document indices so each group stays within the token budget
+
+    A single document larger than the budget still gets a group of its own.
+    """
+    groups = []
+    current = []
+    current_tokens = 0
+    for i, tokens in enumerate(token_counts):
+        if current and current_tokens + tokens > budget:
+            groups.append(current)
+            current = []
+            current_tokens = 0
+        current.append(i)
+        current_tokens += tokens
+    if current:
+        groups.append(current)
+    return groups
+
+def deduplicate_documents(documents):
+    """
+    Collapse documents that only differ in whitespace so each is scored once
+
+    Hybrid retrieval often returns the same chunk from both the vector and the
+    keyword leg. The first occurrence of each document is the one scored.
+
+    Returns:
+        tuple: (unique documents, index of the unique document for every original index)
+    """
+    positions = {}
+    unique_documents = []
+    document_map = []
+    for document in documents:
+        key = hashlib.blake2b(" ".join(document.split()).encode("utf-8"), digest_size=16).digest()
+        if key not in positions:
+            positions[key] = len(unique_documents)
+            unique_documents.append(document)
+        document_map.append(positions[key])
+    return unique_documents, document_map
+
+def split_into_windows(documents, window_tokens, stride, tokenizer):
+    """
+    Split documents into overlapping token windows
+
+    Args:
+        documents (list): Document texts
+        window_tokens (int): Maximum number of tokens per window
+        stride (int): Number of tokens between the starts of consecutive windows
+        tokenizer: Fast tokenizer of the loaded model
+
+    Returns:
+        list: (document_index, start_char, end_char, token_count) tuples
+    """
+    windows = []
+    encoded = tokenizer(documents, add_special_tokens=False, return_offsets_mapping=True)
+    for doc_index, offsets in enumerate(encoded["offset_mapping"]):
+        if len(offsets) <= window_tokens:
+            windows.append((doc_index, 0, len(documents[doc_index]), len(offsets)))
+            continue
+        for start in range(0, len(offsets), stride):
+            end = min(start + window_tokens, len(offsets))
+            windows.append((doc_index, offsets[start][0], offsets[end - 1][1], end - start))
+            if end == len(offsets):
+                break
+    return windows
+
+def aggregate_window_scores(window_scores, aggregation):
+    """
+    Combine the scores of one document's windows into a single document score
+    """
+    if aggregation == "max":
+        return float(max(window_scores))
+    if aggregation == "mean":
+        return float(sum(window_scores) / len(window_scores))
+    if aggregation == "top2":
+        best = heapq.nlargest(2, window_scores)
+        return float(sum(best) / len(best))
+    raise ValueError(f"Unsupported aggregation: {aggregation}")
+
+def plan_sub_requests(pair_tokens, stats):
+    """
+    Enforce the per-request token budget
+
+    Returns:
+        list: Groups of pair indices to score together, or None if the request is rejected
+    """
+    request_tokens = sum(pair_tokens)
+    stats["request_tokens"] = request_tokens
+    stats["token_budget"] = MAX_REQUEST_TOKENS
+
+    if MAX_REQUEST_TOKENS and request_tokens > MAX_REQUEST_TOKENS:
+        if REQUEST_TOKEN_POLICY == "reject":
+            return None
+        groups = split_by_token_budget(pair_tokens, MAX_REQUEST_TOKENS)
+    else:
+        groups = [list(range(len(pair_tokens)))]
+    stats["sub_requests"] = len(groups)
+    return groups
+
+def pack_pairs(head, tail, doc_ids, doc_lengths, pad_token_id):
+    """
+    Pack query-document pairs into left-padded input tensors
+
+    With left padding every sequence ends at the last column, so the template
+    tail, the documents and the template head plus query land at computed
+    offsets and the whole batch is filled with a few indexed assignments.
+
+    Args:
+        head (np.ndarray): Chat prefix, query prompt and separator token IDs
+        tail (np.ndarray): Separator, task prompt and chat suffix token IDs
+        doc_ids (np.ndarray): Document token IDs of the batch, concatenated
+        doc_lengths (np.ndarray): Number of document tokens per pair
+        pad_token_id (int): Padding token ID
+
+    Returns:
+        tuple: (input_ids, attention_mask) tensors
+    """
+    rows = len(doc_lengths)
+    lengths = len(head) + doc_lengths + len(tail)
+    width = -(-int(lengths.max()) // 8) * 8
+
+    input_ids = np.full((rows, width), pad_token_id, dtype=np.int64)
+    doc_end = width - len(tail)
+    doc_start = doc_end - doc_lengths
+    input_ids[:, doc_end:] = tail
+
+    token_rows = np.repeat(np.arange(rows), doc_lengths)
+    token_positions = np.arange(len(doc_ids)) - np.repeat(np.cumsum(doc_lengths) - doc_lengths, doc_lengths)
+    input_ids[token_rows, doc_start[token_rows] + token_positions] = doc_ids
+    input_ids[np.arange(rows)[:, None], (doc_start - len(head))[:, None] + np.arange(len(head))] = head
+
+    attention_mask = (np.arange(width) >= (width - lengths)[:, None]).astype(np.int64)
+    return torch.from_numpy(input_ids), torch.from_numpy(attention_mask)
+
+def encode_pairs(model, query, texts):
+    """
+    Tokenize a request the way MxbaiRerankV2.prepare_inputs does
+
+    The query is tokenized once and all documents in one batched call.
+
+    Returns:
+        tuple: (head, tail, flat_ids, lengths, offsets) where head is the chat
+        prefix, query prompt and separator, tail the separator, task prompt and
+        chat suffix, and flat_ids the concatenated document token IDs with their
+        per-document lengths and start offsets
+    """
+    tokenizer = model.tokenizer
+    query_ids = tokenizer(
+        model.query_prompt.format(query=query),
+        add_special_tokens=False,
+        truncation=True,
+        max_length=model.max_length * 3 // 4
+    )["input_ids"]
+    doc_limit = min(
+        model.model_max_length - len(query_ids) - model.predefined_length,
+        model.max_length - len(query_ids) - len(model.sep_inputs)
+    )
+    encoded = tokenizer(
+        [model.doc_prompt.format(document=text) for text in texts],
+        add_special_tokens=False,
+        truncation=True,
+        max_length=doc_limit
+    )["input_ids"]
+
+    lengths = np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded))
+    flat_ids = np.fromiter(itertools.chain.from_iterable(encoded), dtype=np.int64, count=int(lengths.sum()))
+    offsets = np.cumsum(lengths) - lengths
+
+    head = np.array(model.chat_template_prefix_inputs + query_ids + model.sep_inputs, dtype=np.int64)
+    tail = np.array(
+        model.sep_inputs + model.task_prompt_inputs + model.chat_template_suffix_inputs,
+        dtype=np.int64
+    )
+    return head, tail, flat_ids, lengths, offsets
+
+def gather_tokens(flat_ids, offsets, lengths):
+    """
+    Concatenated token IDs of the selected documents
+    """
+    starts = np.repeat(np.cumsum(lengths) - lengths, lengths)
+    return flat_ids[np.repeat(offsets, lengths) + np.arange(int(lengths.sum())) - starts]
+
+def score_pairs(model, query, texts, batch_size=SCORING_BATCH_SIZE):
+    """
+    Score every text against the query with packed tensors
+
+    Builds the same token sequences as MxbaiRerankV2.prepare_inputs; pairs are
+    sorted by length so batches carry little padding.
+
+    Returns:
+        np.ndarray: Scores in the same order as texts
+    """
+    head, tail, flat_ids, lengths, offsets = encode_pairs(model, query, texts)
+
+    scores = np.empty(len(texts), dtype=np.float32)
+    order = np.argsort(-lengths, kind="stable")
+    with torch.inference_mode():
+        for start in range(0, len(order), batch_size):
+            batch = order[start:start + batch_size]
+            input_ids, attention_mask = pack_pairs(
+                head, tail, gather_tokens(flat_ids, offsets[batch], lengths[batch]), lengths[batch],
+                model.tokenizer.pad_token_id
+            )
+            logits = model.forward(
+                input_ids=input_ids.to(model.device),
+                attention_mask=attention_mask.to(model.device)
+            ).logits
+            scores[batch] = logits.float().cpu().numpy()
+    return scores
+
+def pack_continuations(tail, doc_ids, doc_lengths, pad_token_id):
+    """
+    Pack document continuations of a cached prompt prefix into right-padded IDs
+
+    Returns:
+        tuple: (input_ids, continuation_lengths) arrays
+    """
+    rows = len(doc_lengths)
+    continuation_lengths = doc_lengths + len(tail)
+    width = int(continuation_lengths.max())
+
+    input_ids = np.full((rows, width), pad_token_id, dtype=np.int64)
+    token_rows = np.repeat(np.arange(rows), doc_lengths)
+    token_positions = np.arange(len(doc_ids)) - np.repeat(np.cumsum(doc_lengths) - doc_lengths, doc_lengths)
+    input_ids[token_rows, token_positions] = doc_ids
+    input_ids[np.arange(rows)[:, None], doc_lengths[:, None] + np.arange(len(tail))] = tail
+    return input_ids, continuation_lengths
+
+def encode_prefix(model, head):
+    """
+    Key/value cache of the shared prompt prefix, as (key, value) tensors per layer
+    """
+    decoder = model.model.get_decoder()
+    prefix = decoder(input_ids=torch.from_numpy(head)[None].to(model.device), use_cache=True)
+    return prefix.past_key_values.to_legacy_cache()
+
+def score_continuations(model, prefix_cache, prefix_length, input_ids, continuation_lengths):
+    """
+    Scores of a batch of continuations attending to the cached prefix
+
+    The prefix cache is broadcast over the batch and positions continue after
+    the prefix. Only the yes/no rows of the output projection are applied, at
+    each sequence's last real token.
+
+    Returns:
+        torch.Tensor: Scores on the model device
+    """
+    causal_lm = model.model
+    output_weights = causal_lm.get_output_embeddings().weight
+    score_direction = (output_weights[model.yes_loc] - output_weights[model.no_loc]).float()
+
+    rows, width = input_ids.shape
+    attention_mask = np.concatenate([
+        np.ones((rows, prefix_length), dtype=np.int64),
+        (np.arange(width) < continuation_lengths[:, None]).astype(np.int64)
+    ], axis=1)
+    cache = DynamicCache.from_legacy_cache(tuple(
+        (key.expand(rows, -1, -1, -1), value.expand(rows, -1, -1, -1))
+        for key, value in prefix_cache
+    ))
+
+    hidden = causal_lm.get_decoder()(
+        input_ids=torch.from_numpy(input_ids).to(model.device),
+        attention_mask=torch.from_numpy(attention_mask).to(model.device),
+        position_ids=torch.arange(prefix_length, prefix_length + width, device=model.device)[None].expand(rows, -1),
+        past_key_values=cache,
+        use_cache=True
+    ).last_hidden_state
+    last_positions = torch.from_numpy(continuation_lengths - 1).to(model.device)
+    last = hidden[torch.arange(rows, device=model.device), last_positions]
+    return last.float() @ score_direction
+
+def score_pairs_with_prefix_cache(model, query, texts, batch_size=SCORING_BATCH_SIZE):
+    """
+    Score every text against the query, encoding the shared prompt prefix once
+
+    The chat prefix and query are run through the decoder a single time and
+    each batch of document continuations reuses that key/value cache.
+
+    Returns:
+        np.ndarray: Scores in the same order as texts
+    """
+    head, tail, flat_ids, lengths, offsets = encode_pairs(model, query, texts)
+
+    scores = np.empty(len(texts), dtype=np.float32)
+    order = np.argsort(-lengths, kind="stable")
+    with torch.inference_mode():
+        prefix_cache = encode_prefix(model, head)
+        for start in range(0, len(order), batch_size):
+            batch = order[start:start + batch_size]
+            input_ids, continuation_lengths = pack_continuations(
+                tail, gather_tokens(flat_ids, offsets[batch], lengths[batch]), lengths[batch],
+                model.tokenizer.pad_token_id
+            )
+            batch_scores = score_continuations(model, prefix_cache, len(head), input_ids, continuation_lengths)
+            scores[batch] = batch_scores.cpu().numpy()
+    return scores
+
+def score_pairs_pipelined(model, query, texts, batch_size=SCORING_BATCH_SIZE, queue_size=PIPELINE_QUEUE_SIZE, timings=None):
+    """
+    Score every text against the query with tokenization, model and assembly overlapped
+
+    A producer thread tokenizes and packs batch i+1 while the model runs batch
+    i on the calling thread, and a consumer thread copies scores back into the
+    result array. Stages are connected by bounded queues, so at most queue_size
+    packed batches wait in memory. Batches are ordered by character length, as
+    token lengths are only known once a batch has been tokenized.
+
+    Args:
+        timings (dict): If given, receives the busy time of each stage, the wall
+            time (ms) and the overlap (summed busy time / wall time)
+
+    Returns:
+        np.ndarray: Scores in the same order as texts
+    """
+    pad_token_id = model.tokenizer.pad_token_id
+    order = sorted(range(len(texts)), key=lambda i: -len(texts[i]))
+    batches = [order[start:start + batch_size] for start in range(0, len(order), batch_size)]
+
+    packed_batches = queue.Queue(maxsize=queue_size)
+    batch_results = queue.Queue(maxsize=queue_size)
+    stop = threading.Event()
+    errors = []
+    busy = {"tokenize": 0.0, "model": 0.0, "assemble": 0.0}
+    scores = np.empty(len(texts), dtype=np.float32)
+
+    def produce():
+        try:
+            for batch in batches:
+                if stop.is_set():
+                    return
+                start = time.perf_counter()
+                head, tail, flat_ids, lengths, _ = encode_pairs(model, query, [texts[i] for i in batch])
+                if PREFIX_CACHE_SCORING:
+                    packed = (head,) + pack_continuations(tail, flat_ids, lengths, pad_token_id)
+                else:
+                    packed = (head,) + pack_pairs(head, tail, flat_ids, lengths, pad_token_id)
+                busy["tokenize"] += time.perf_counter() - start
+                packed_batches.put((batch, packed))
+        except Exception as error:
+            errors.append(error)
+        packed_batches.put(None)
+
+    def consume():
+        while True:
+            item = batch_results.get()
+            if item is None:
+                return
+            if errors:
+                continue
+            batch, result = item
+            start = time.perf_counter()
+            try:
+                scores[batch] = result.float().cpu().numpy()
+            except Exception as error:
+                errors.append(error)
+            busy["assemble"] += time.perf_counter() - start
+
+    wall_start = time.perf_counter()
+    producer = threading.Thread(target=produce, daemon=True)
+    consumer = threading.Thread(target=consume, daemon=True)
+    producer.start()
+    consumer.start()
+    try:
+        prefix_cache = None
+        with torch.inference_mode():
+            while not errors:
+                item = packed_batches.get()
+                if item is None:
+                    break
+                batch, packed = item
+                start = time.perf_counter()
+                if PREFIX_CACHE_SCORING:
+                    head, input_ids, continuation_lengths = packed
+                    if prefix_cache is None:
+                        prefix_cache = encode_prefix(model, head)
+                    result = score_continuations(model, prefix_cache, len(head), input_ids, continuation_lengths)
+                else:
+                    _, input_ids, attention_mask = packed
+                    result = model.forward(
+                        input_ids=input_ids.to(model.device),
+                        attention_mask=attention_mask.to(model.device)
+                    ).logits
+                busy["model"] += time.perf_counter() - start
+                batch_results.put((batch, result))
+    finally:
+        # Unblock the producer if the model stage stopped early
+        stop.set()
+        while producer.is_alive():
+            try:
+                packed_batches.get(timeout=0.01)
+            except queue.Empty:
+                pass
+        batch_results.put(None)
+        consumer.join()
+
+    if errors:
+        raise errors[0]
+
+    if timings is not None:
+        wall = time.perf_counter() - wall_start
+        timings.update({f"{stage}_ms": 1000 * seconds for stage, seconds in busy.items()})
+        timings["wall_ms"] = 1000 * wall
+        timings["overlap"] = sum(busy.values()) / max(wall, 1e-9)
+    return scores
+
+def score_texts(model, query, texts, groups, stats=None):
+    """
+    Score every text against the query, one batched model call per group
+
+    Groups of at least PIPELINE_MIN_PAIRS pairs use the pipelined path; its
+    stage timings are appended to stats["pipeline"].
+
+    Returns:
+        np.ndarray: Scores in the same order as texts
+    """
+    scores = np.zeros(len(texts), dtype=np.float32)
+    for group in groups:
+        if VECTORIZED_SCORING and len(group) >= PIPELINE_MIN_PAIRS:
+            timings = {}
+            scores[group] = score_pairs_pipelined(model, query, [texts[i] for i in group], timings=timings)
+            if stats is not None:
+                stats.setdefault("pipeline", []).append(timings)
+            continue
+        if VECTORIZED_SCORING:
+            score = score_pairs_with_prefix_cache if PREFIX_CACHE_SCORING else score_pairs
+            scores[group] = score(model, query, [texts[i] for i in group])
+            continue
+        group_results = model.rank(
+            query=query,
+            documents=[texts[i] for i in group],
+            return_documents=False,
+            top_k=len(group),
+            sort=False
+        )
+        for result in group_results:
+            scores[group[result.index]] = result.score
+    return scores
+
+def score_threshold(best_score, min_score=None, relative_gap=None):
+    """
+    Lowest score worth returning as a Python float, or None if no cutoff was requested
+
+    Args:
+        best_score (float): Score of the best document
+        min_score (float): Absolute cutoff on the logit score
+        relative_gap (float): Drop documents more than this far below the best score
     """
-    Apply model to the input data
+    thresholds = []
+    if min_score is not None:
+        thresholds.append(min_score)
+    if relative_gap is not None:
+        thresholds.append(best_score - relative_gap)
+    # Scores come from float32 arrays, which json.dumps rejects
+    return float(max(thresholds)) if thresholds else None
+
+def select_top(scores, k, threshold=None):
+    """
+    Indices of the k best scores, best first, ties to the lower index
+
+    Uses partial selection, so only the selected scores are sorted.
+    """
+    scores = np.asarray(scores, dtype=np.float64)
+    candidates = np.arange(len(scores))
+    if threshold is not None:
+        candidates = candidates[scores >= threshold]
+    if k <= 0 or len(candidates) == 0:
+        return []
+    if len(candidates) > k:
+        candidate_scores = scores[candidates]
+        kth_score = candidate_scores[np.argpartition(-candidate_scores, k - 1)[k - 1]]
+        candidates = candidates[candidate_scores >= kth_score]
+    order = np.lexsort((candidates, -scores[candidates]))
+    return candidates[order][:k].tolist()
+
+def requested_top_k(input_data):
+    """
+    Number of results a request asks for: "max_k", else "top_k", else 3
+
+    An explicit null counts as not set.
+    """
+    for key in ("max_k", "top_k"):
+        if input_data.get(key) is not None:
+            return input_data[key]
+    return 3
+
+def rerank(input_data, model):
+    """
+    Rerank the documents of one request
+
+    Supported modes:
+        truncate (default): Score each document pre-truncated to the max length
+        windowed: Score overlapping token windows of each document and aggregate
+            them with "max", "mean" or "top2" (mean of the two best windows)
+        adaptive: Score every document on its first cheap_tokens tokens, then
+            rescore at full length only the rescore_band documents on either side
+            of the top_k cutoff
+
+    The response holds at most top_k results ("max_k" overrides it), cut further
+    by "min_score" and by "relative_gap", the largest distance below the best
+    score a returned document may have.
+
+    Documents that only differ in whitespace are scored once and the score is
+    reported for every original index (disable with "deduplicate": false).
+    best_window offsets refer to the first occurrence of a duplicated document.
+
+    Instead of documents, a request can name a corpus loaded from CORPUS_DIR;
+    the top "candidates" chunks (default 200) are then fetched from its ANN
+    index ("n_probe" lists are searched) and results carry their chunk_id.
     """
     query = input_data.get('query')
     documents = input_data.get('documents', [])
+    corpus = input_data.get('corpus')
+    chunk_ids = None
     return_documents = input_data.get('return_documents', True)
-    top_k = input_data.get('top_k', 3)
-    
-    # Perform reranking
-    results = model.rank(
-        query=query, 
-        documents=documents, 
-        return_documents=return_documents, 
-        top_k=top_k
+    top_k = requested_top_k(input_data)
+    min_score = input_data.get('min_score')
+    relative_gap = input_data.get('relative_gap')
+    max_length = min(input_data.get('max_length', MAX_SEQUENCE_LENGTH), MAX_SEQUENCE_LENGTH)
+    mode = input_data.get('mode', 'truncate')
+
+    if corpus is not None and query:
+        if corpus not in corpora:
+            return {"error": f"Unknown corpus: {corpus}"}
+        chunk_ids, documents = corpora[corpus].fetch(
+            query,
+            input_data.get('candidates', 200),
+            input_data.get('n_probe')
+        )
+
+    if not query or not documents:
+        return {"error": "Both query and documents are required"}
+    if mode not in ("truncate", "windowed", "adaptive"):
+        return {"error": f"Unsupported mode: {mode}"}
+
+    # Score each distinct document once and fan the scores back out afterwards
+    original_documents = documents
+    if input_data.get('deduplicate', True):
+        documents, document_map = deduplicate_documents(documents)
+    else:
+        document_map = list(range(len(documents)))
+
+    tokenizer = model.tokenizer
+
+    # Leave room for the query and the prompt template around each document
+    query_tokens = count_tokens(model.query_prompt.format(query=query), tokenizer)
+    doc_overhead = count_tokens(model.doc_prompt.format(document=""), tokenizer) + len(model.sep_inputs)
+    pair_overhead = query_tokens + doc_overhead + model.predefined_length
+    doc_max_tokens = max(1, max_length - query_tokens - doc_overhead)
+
+    stats = {
+        "mode": mode,
+        "max_length": max_length,
+        "documents": len(original_documents),
+        "unique_documents": len(documents)
+    }
+    if corpus is not None:
+        stats["corpus"] = corpus
+
+    if mode == "windowed":
+        # Every window of every document is scored in the same batched pass
+        window_tokens = input_data.get('window_tokens', doc_max_tokens)
+        if window_tokens < 1:
+            return {"error": f"window_tokens must be at least 1, got {window_tokens}"}
+        window_tokens = min(window_tokens, doc_max_tokens)
+        window_overlap = input_data.get('window_overlap', window_tokens // 4)
+        if not 0 <= window_overlap < window_tokens:
+            return {"error": f"window_overlap must be at least 0 and below window_tokens ({window_tokens}), got {window_overlap}"}
+        stride = window_tokens - window_overlap
+        aggregation = input_data.get('aggregation', 'max')
+        if aggregation not in ("max", "mean", "top2"):
+            return {"error": f"Unsupported aggregation: {aggregation}"}
+
+        windows = split_into_windows(documents, window_tokens, stride, tokenizer)
+        texts = [documents[doc_index][start:end] for doc_index, start, end, _ in windows]
+        pair_tokens = [pair_overhead + tokens for _, _, _, tokens in windows]
+        stats["windows"] = len(windows)
+        stats["aggregation"] = aggregation
+    else:
+        # Pre-truncate documents at the token level, to a short prefix for the adaptive first pass
+        if mode == "adaptive":
+            cheap_tokens = input_data.get('cheap_tokens', ADAPTIVE_CHEAP_TOKENS)
+            if cheap_tokens < 1:
+                return {"error": f"cheap_tokens must be at least 1, got {cheap_tokens}"}
+            cheap_tokens = min(cheap_tokens, doc_max_tokens)
+            truncated = truncate_documents(documents, cheap_tokens, tokenizer)
+        else:
+            truncated = truncate_documents(documents, doc_max_tokens, tokenizer)
+        texts = [text for text, _, _ in truncated]
+        pair_tokens = [pair_overhead + tokens for _, tokens, _ in truncated]
+        stats["truncated_documents"] = sum(1 for _, _, was_truncated in truncated if was_truncated)
+
+    groups = plan_sub_requests(pair_tokens, stats)
+    if groups is None:
+        return {
+            "error": f"Request needs {stats['request_tokens']} tokens, budget is {MAX_REQUEST_TOKENS}",
+            "stats": stats
+        }
+
+    scores = score_texts(model, query, texts, groups, stats)
+
+    best_windows = {}
+    if mode == "windowed":
+        window_scores = [[] for _ in documents]
+        for (doc_index, start, end, _), score in zip(windows, scores):
+            window_scores[doc_index].append(score)
+            if doc_index not in best_windows or score > best_windows[doc_index][0]:
+                best_windows[doc_index] = (score, start, end)
+        scores = [aggregate_window_scores(doc_scores, aggregation) for doc_scores in window_scores]
+
+    rescored = set()
+    if mode == "adaptive":
+        # Documents well above the cutoff keep their place, only the ambiguous band
+        # around it is rescored at full length and reordered
+        rescore_band = input_data.get('rescore_band', top_k)
+        order = select_top(scores, top_k + rescore_band)
+        head = order[:max(0, top_k - rescore_band)]
+        band = order[len(head):]
+
+        # Documents that fit in the cheap pass already have their full-length score
+        upgrade = [i for i in band if truncated[i][2]]
+        if upgrade:
+            full = truncate_documents([documents[i] for i in upgrade], doc_max_tokens, tokenizer)
+            full_stats = {}
+            full_groups = plan_sub_requests([pair_overhead + tokens for _, tokens, _ in full], full_stats)
+            if full_groups is None:
+                full_groups = [[i] for i in range(len(upgrade))]
+            full_scores = score_texts(model, query, [text for text, _, _ in full], full_groups)
+            for i, score in zip(upgrade, full_scores):
+                scores[i] = score
+            rescored.update(upgrade)
+            stats["request_tokens"] += full_stats["request_tokens"]
+
+        stats["cheap_tokens"] = cheap_tokens
+        stats["upgraded_pairs"] = len(upgrade)
+        ranked = (head + [band[j] for j in select_top([scores[i] for i in band], len(band))])[:top_k]
+        threshold = score_threshold(max(scores[i] for i in ranked), min_score, relative_gap) if ranked else None
+        if threshold is not None:
+            ranked = [i for i in ranked if scores[i] >= threshold]
+    else:
+        threshold = score_threshold(np.max(scores), min_score, relative_gap)
+        ranked = select_top(scores, top_k, threshold)
+
+    if threshold is not None:
+        stats["score_threshold"] = threshold
+
+    # Expand each ranked unique document to all of its original indices
+    occurrences = [[] for _ in documents]
+    for index, unique in enumerate(document_map):
+        occurrences[unique].append(index)
+    ranked_indices = [index for unique in ranked for index in occurrences[unique]][:top_k]
+
+    results = []
+    for index in ranked_indices:
+        unique = document_map[index]
+        result = {
+            "index": index,
+            "score": float(scores[unique]),
+            "document": original_documents[index] if return_documents else None
+        }
+        if chunk_ids is not None:
+            result["chunk_id"] = chunk_ids[index]
+        if unique in best_windows:
+            _, start, end = best_windows[unique]
+            result["best_window"] = {"start": start, "end": end}
+        if mode == "adaptive":
+            result["rescored"] = unique in rescored
+        results.append(result)
+
+    print(
+        f"Reranked {len(original_documents)} documents ({len(documents)} unique) in {mode} mode "
+        f"({len(texts)} pairs, {stats['request_tokens']} tokens, {stats['sub_requests']} sub-requests)"
     )
-    
-    return results
+
+    return {"results": results, "stats": stats}
+
+def estimate_request_cost(input_data):
+    """
+    Estimated number of tokens a request will score, before tokenizing anything
+
+    Returns:
+        tuple: (pairs, cost at the requested mode, cost if degraded to adaptive mode)
+    """
+    max_length = min(input_data.get('max_length', MAX_SEQUENCE_LENGTH), MAX_SEQUENCE_LENGTH)
+    if input_data.get('corpus') is not None:
+        full_tokens = [max_length] * input_data.get('candidates', 200)
+    else:
+        full_tokens = [len(document) // ESTIMATED_CHARS_PER_TOKEN + 1 for document in input_data.get('documents', [])]
+    doc_tokens = [min(max_length, tokens) for tokens in full_tokens]
+
+    cost = sum(doc_tokens)
+    if input_data.get('mode', 'truncate') == "windowed":
+        # Every token is scored, and the default window overlap scores a third more
+        cost = sum(full_tokens) * 4 // 3
+
+    top_k = requested_top_k(input_data)
+    cheap_tokens = input_data.get('cheap_tokens', ADAPTIVE_CHEAP_TOKENS)
+    rescored = sorted(doc_tokens, reverse=True)[:2 * top_k]
+    degraded_cost = sum(min(tokens, cheap_tokens) for tokens in doc_tokens) + sum(rescored)
+    return len(doc_tokens), cost, degraded_cost
+
+class AdmissionController:
+    """
+    Bounds the estimated cost of the requests in flight in this process
+
+    Interactive requests may use the whole budget; batch requests only
+    ADMISSION_BATCH_FRACTION of it, and never while an interactive request is
+    waiting. A request is admitted alone even if it exceeds the budget, so
+    large requests are slowed down rather than starved.
+    """
+
+    def __init__(self, max_cost, batch_fraction=0.5):
+        self.max_cost = max_cost
+        self.batch_fraction = batch_fraction
+        self.in_flight_cost = 0
+        self.in_flight_pairs = 0
+        self.interactive_waiting = 0
+        self.condition = threading.Condition()
+        self.counters = {"admitted": 0, "degraded": 0, "rejected": 0}
+
+    def _fits(self, cost, lane):
+        if self.in_flight_cost == 0:
+            return True
+        if lane == "batch":
+            return not self.interactive_waiting and self.in_flight_cost + cost <= self.max_cost * self.batch_fraction
+        return self.in_flight_cost + cost <= self.max_cost
+
+    def acquire(self, cost, pairs, lane, timeout=0.0):
+        """
+        Reserve capacity for a request, waiting up to timeout seconds
+
+        Returns:
+            bool: Whether the request was admitted
+        """
+        deadline = time.monotonic() + timeout
+        with self.condition:
+            if lane == "interactive":
+                self.interactive_waiting += 1
+            try:
+                while not self._fits(cost, lane):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return False
+                    self.condition.wait(remaining)
+                self.in_flight_cost += cost
+                self.in_flight_pairs += pairs
+                return True
+            finally:
+                if lane == "interactive":
+                    self.interactive_waiting -= 1
+
+    def release(self, cost, pairs):
+        with self.condition:
+            self.in_flight_cost -= cost
+            self.in_flight_pairs -= pairs
+            self.condition.notify_all()
+
+    def record(self, outcome):
+        """
+        Count a request outcome ("admitted", "degraded" or "rejected")
+        """
+        with self.condition:
+            self.counters[outcome] += 1
+
+    def snapshot(self):
+        with self.condition:
+            return dict(self.counters, in_flight_cost=self.in_flight_cost, in_flight_pairs=self.in_flight_pairs)
+
+admission = AdmissionController(ADMISSION_MAX_COST, ADMISSION_BATCH_FRACTION)
+
+class ModelRoute:
+    """
+    One hosted model with its lock, queue and latency metrics
+
+    Latency is predicted from the estimated cost queued on the route and a
+    moving average of the measured milliseconds per estimated token.
+    """
+
+    def __init__(self, name, model, lock=None, history=1000):
+        self.name = name
+        self.model = model
+        # predict_fn keeps receiving the model model_fn returned, even after a swap
+        self.initial_model = model
+        # Model the request holding the lock is running on, if any
+        self.serving = None
+        self.lock = lock or threading.Lock()
+        self.state_lock = threading.Lock()
+        self.queue_depth = 0
+        self.queued_cost = 0
+        self.ms_per_token = None
+        self.requests = 0
+        self.pairs = 0
+        self.latencies = deque(maxlen=history)
+
+    def predicted_ms(self, cost):
+        with self.state_lock:
+            return (self.queued_cost + cost) * (self.ms_per_token or 0.0)
+
+    def run(self, input_data, cost, pairs):
+        """
+        Score a request on this route
+
+        Returns:
+            tuple: (prediction, queue wait in ms, total latency in ms)
+        """
+        started = time.perf_counter()
+        with self.state_lock:
+            self.queue_depth += 1
+            self.queued_cost += cost
+        try:
+            with self.lock:
+                service_started = time.perf_counter()
+                # Read and marked in one step, so a swap either sees this request or hands it the new model
+                with self.state_lock:
+                    serving = self.serving = self.model
+                try:
+                    prediction = rerank(input_data, serving)
+                finally:
+                    with self.state_lock:
+                        self.serving = None
+                service_ms = 1000 * (time.perf_counter() - service_started)
+        finally:
+            with self.state_lock:
+                self.queue_depth -= 1
+                self.queued_cost -= cost
+
+        latency_ms = 1000 * (time.perf_counter() - started)
+        with self.state_lock:
+            observed = service_ms / max(cost, 1)
+            self.ms_per_token = observed if self.ms_per_token is None else 0.8 * self.ms_per_token + 0.2 * observed
+            self.requests += 1
+            self.pairs += pairs
+            self.latencies.append(latency_ms)
+        return prediction, 1000 * (service_started - started), latency_ms
+
+    def calibrate(self, documents=8, repeats=2):
+        """
+        Measure the cost of a representative request so routing starts informed
+        """
+        text = "The fixed deposit interest rate for senior citizens is revised every quarter. " * 20
+        request = {"query": "fixed deposit rate", "documents": [text] * documents, "deduplicate": False}
+        pairs, cost, _ = estimate_request_cost(request)
+        self.run(request, cost, pairs)
+        # The first run includes one-off warmup work
+        self.ms_per_token = None
+        for _ in range(repeats):
+            self.run(request, cost, pairs)
+        with self.state_lock:
+            self.requests = 0
+            self.pairs = 0
+            self.latencies.clear()
+
+    def metrics(self):
+        with self.state_lock:
+            latencies = np.array(self.latencies) if self.latencies else np.zeros(1)
+            return {
+                "requests": self.requests,
+                "pairs": self.pairs,
+                "queue_depth": self.queue_depth,
+                "ms_per_token": self.ms_per_token,
+                "p50_ms": float(np.percentile(latencies, 50)),
+                "p95_ms": float(np.percentile(latencies, 95)),
+                "p99_ms": float(np.percentile(latencies, 99))
+            }
+
+def route_for(model):
+    """
+    Route of a model passed to predict_fn, registered on first use
+    """
+    for route in routes.values():
+        if route.model is model or route.initial_model is model:
+            return route
+    name = "base" if "base" not in routes else f"model-{len(routes)}"
+    routes[name] = ModelRoute(name, model, model_lock if name == "base" else None)
+    return routes[name]
+
+def select_route(input_data, cost, default_route):
+    """
+    Pick the model for a request
+
+    An explicit "route" wins. With a "latency_budget_ms", the base model is used
+    if its predicted latency (queued cost plus this request) fits the budget,
+    otherwise whichever route is predicted to be faster. Without a budget the
+    base model is used unless ROUTE_MAX_QUEUE requests are already queued on it.
+    """
+    requested = input_data.get('route')
+    if requested is not None:
+        return routes.get(requested)
+
+    small = routes.get("small")
+    if small is None or small is default_route:
+        return default_route
+
+    latency_budget_ms = input_data.get('latency_budget_ms')
+    if latency_budget_ms is not None:
+        if default_route.predicted_ms(cost) <= latency_budget_ms:
+            return default_route
+        return min((default_route, small), key=lambda route: route.predicted_ms(cost))
+
+    if default_route.queue_depth >= ROUTE_MAX_QUEUE:
+        return small
+    return default_route
+
+def route_metrics():
+    """
+    Per-route volume and latency, plus admission counters and the last model swap
+    """
+    return {
+        "routes": {name: route.metrics() for name, route in routes.items()},
+        "admission": admission.snapshot(),
+        "swap": swap_status_snapshot()
+    }
+
+def warmup_model(model, lengths=None, repeats=2):
+    """
+    Run a model on documents of representative token lengths before it serves traffic
+
+    Each length is scored both as a single document and as a full scoring batch,
+    so first requests do not pay for kernel selection and allocator growth.
+
+    Args:
+        model: Model to warm up
+        lengths (list): Document lengths in tokens (defaults to WARMUP_LENGTHS)
+        repeats (int): Passes over all lengths; only the last one is measured
+
+    Returns:
+        float: Measured milliseconds per estimated token, or None without lengths
+    """
+    lengths = [min(n, MAX_SEQUENCE_LENGTH) for n in (WARMUP_LENGTHS if lengths is None else lengths)]
+    text = "The fixed deposit interest rate for senior citizens is revised every quarter. " * (MAX_SEQUENCE_LENGTH // 4)
+    requests = []
+    for length in lengths:
+        document = truncate_documents([text], length, model.tokenizer)[0][0]
+        for documents in (1, SCORING_BATCH_SIZE):
+            requests.append({"query": "fixed deposit rate", "documents": [document] * documents, "deduplicate": False})
+
+    ms_per_token = None
+    for _ in range(repeats):
+        total_cost = 0
+        started = time.perf_counter()
+        for request in requests:
+            rerank(request, model)
+            total_cost += estimate_request_cost(request)[1]
+        if total_cost:
+            ms_per_token = 1000 * (time.perf_counter() - started) / total_cost
+    return ms_per_token
+
+def release_model(old_model):
+    """
+    Free the weights of a model that no longer serves requests
+
+    The model object itself may outlive this (the serving framework holds the
+    one model_fn returned), so its underlying network is dropped explicitly.
+    """
+    old_model.model = None
+    gc.collect()
+    if torch.cuda.is_available():
+        torch.cuda.empty_cache()
+
+def update_swap_status(**fields):
+    """
+    Publish fields of the swap status together, so readers never see half an update
+    """
+    with _swap_status_lock:
+        swap_status.update(fields)
+
+def swap_status_snapshot():
+    with _swap_status_lock:
+        return dict(swap_status)
+
+def _swap(model_path, route_name, warmup_lengths):
+    global model
+    try:
+        route = routes[route_name]
+        update_swap_status(state="loading", started_at=time.time())
+        print(f"Loading model {model_path} for route {route_name}")
+        started = time.perf_counter()
+        new_model = MxbaiRerankV2(model_path, device=device, max_length=MAX_SEQUENCE_LENGTH)
+        update_swap_status(state="warming", load_ms=1000 * (time.perf_counter() - started))
+
+        started = time.perf_counter()
+        ms_per_token = warmup_model(new_model, warmup_lengths)
+        warmup_ms = 1000 * (time.perf_counter() - started)
+
+        # New requests pick up the new model; the one holding the route lock finishes on the old one
+        with route.state_lock:
+            old_model = route.model
+            route.model = new_model
+            route.ms_per_token = ms_per_token or route.ms_per_token
+        if route_name == "base":
+            model = new_model
+        update_swap_status(state="draining", warmup_ms=warmup_ms, swapped_at=time.time())
+
+        # Polled rather than taking route.lock, which queued requests would win first.
+        # The old model stays loaded until no request is serving on it.
+        started = time.perf_counter()
+        while route.serving is old_model:
+            time.sleep(0.005)
+        drain_ms = 1000 * (time.perf_counter() - started)
+
+        # Truncations are keyed by tokenizer path, which a new version may reuse
+        with _truncation_cache_lock:
+            _truncation_cache.clear()
+        release_model(old_model)
+        update_swap_status(state="swapped", drain_ms=drain_ms)
+        print(f"Route {route_name} now serves {model_path}")
+    except Exception as error:
+        update_swap_status(state="failed", error=f"{type(error).__name__}: {error}")
+        print(f"Model swap to {model_path} failed: {error}")
+    finally:
+        _swap_lock.release()
+
+def swap_model(model_path, route_name="base", warmup_lengths=None, wait=False):
+    """
+    Replace the model of a route without interrupting traffic
+
+    The new version is loaded and warmed in a background thread while the
+    current one keeps serving, then swapped in; the old weights are freed once
+    the request in flight on them has finished. Both versions are resident
+    from the start of the load until then.
+
+    Args:
+        model_path (str): Local path (or model name) of the new version
+        route_name (str): Route to swap ("base" or "small")
+        warmup_lengths (list): Token lengths to warm up on (defaults to WARMUP_LENGTHS)
+        wait (bool): Block until the swap has finished or failed
+
+    Returns:
+        dict: Current swap status
+    """
+    if route_name not in routes:
+        raise ValueError(f"Unknown route: {route_name}")
+    if not _swap_lock.acquire(blocking=False):
+        raise RuntimeError("A model swap is already in progress")
+
+    with _swap_status_lock:
+        swap_status.clear()
+        swap_status.update(state="starting", route=route_name, model=model_path)
+    thread = threading.Thread(target=_swap, args=(model_path, route_name, warmup_lengths), daemon=True)
+    thread.start()
+    if wait:
+        thread.join()
+    return swap_status_snapshot()
+
+def predict_fn(input_data, model):
+    """
+    Apply model to the input data, subject to admission control and routing
+
+    With ADMISSION_MAX_COST set, a request whose estimated cost does not fit
+    the in-flight budget is degraded to adaptive mode if it is a truncate-mode
+    request (unless "allow_degrade" is false), then waits up to
+    ADMISSION_QUEUE_TIMEOUT_MS for capacity and is otherwise rejected with an
+    "Overloaded" error. "priority" selects the "interactive" (default) or
+    "batch" lane.
+
+    With SMALL_MODEL_NAME set, each request is routed to the base or the small
+    model (see select_route). Each model scores one request at a time.
+    {"metrics": true} returns route_metrics() instead of scoring. With
+    ALLOW_MODEL_SWAP set, {"swap_model": path, "route": name} starts a
+    background swap (see swap_model) and returns its status.
+    """
+    if input_data.get('metrics'):
+        return route_metrics()
+
+    if input_data.get('swap_model'):
+        if not ALLOW_MODEL_SWAP:
+            return {"error": "Model swaps are disabled"}
+        route_for(model)
+        try:
+            return swap_model(input_data['swap_model'], input_data.get('route', 'base'))
+        except (ValueError, RuntimeError) as error:
+            return {"error": str(error)}
+
+    lane = input_data.get('priority', 'interactive')
+    if lane not in ("interactive", "batch"):
+        return {"error": f"Unsupported priority: {lane}"}
+
+    top_k = requested_top_k(input_data)
+    if not isinstance(top_k, int):
+        return {"error": f"top_k must be an integer, got {top_k!r}"}
+
+    pairs, cost, degraded_cost = estimate_request_cost(input_data)
+    started = time.perf_counter()
+    degraded = False
+    admitted = True
+    if ADMISSION_MAX_COST:
+        admitted = admission.acquire(cost, pairs, lane)
+        if not admitted and input_data.get('mode', 'truncate') == "truncate" and input_data.get('allow_degrade', True):
+            input_data = dict(input_data, mode="adaptive")
+            cost = degraded_cost
+            degraded = True
+        if not admitted:
+            admitted = admission.acquire(cost, pairs, lane, ADMISSION_QUEUE_TIMEOUT_MS / 1000)
+
+        admission.record("admitted" if admitted else "rejected")
+        if admitted and degraded:
+            admission.record("degraded")
+        if not admitted:
+            print(f"Rejected {lane} request of {pairs} pairs (estimated cost {cost})")
+            return {"error": "Overloaded, retry later", "retry_after_ms": ADMISSION_QUEUE_TIMEOUT_MS}
+
+    try:
+        route = select_route(input_data, cost, route_for(model))
+        if route is None:
+            return {"error": f"Unknown route: {input_data.get('route')}"}
+        predicted_ms = route.predicted_ms(cost)
+        admission_ms = 1000 * (time.perf_counter() - started)
+        prediction, waited_ms, latency_ms = route.run(input_data, cost, pairs)
+    finally:
+        if ADMISSION_MAX_COST:
+            admission.release(cost, pairs)
+
+    if "stats" in prediction:
+        prediction["stats"]["route"] = {
+            "name": route.name,
+            "predicted_ms": predicted_ms,
+            "latency_ms": latency_ms,
+            "latency_budget_ms": input_data.get('latency_budget_ms')
+        }
+        if ADMISSION_MAX_COST:
+            prediction["stats"]["admission"] = {
+                "lane": lane,
+                "estimated_cost": cost,
+                "degraded": degraded,
+                "waited_ms": admission_ms + waited_ms
+            }
+    return prediction
 
 def output_fn(prediction, response_content_type):
     """
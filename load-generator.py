@@ -0,0 +1,184 @@
+import argparse
+import json
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from scatter_gather_rerank import local_invoke, sagemaker_invoke
+from script_helpers import VOCABULARY, load_handler
+
+PERCENTILES = [50, 90, 99, 99.9]
+
+def parse_distribution(spec):
+    """
+    Sampler for a distribution written as "fixed:N", "uniform:LOW,HIGH" or "lognormal:MU,SIGMA"
+
+    Samples are integers of at least 1.
+    """
+    kind, _, params = spec.partition(":")
+    values = [float(value) for value in params.split(",")]
+    if kind == "fixed":
+        return lambda rng: max(1, int(values[0]))
+    if kind == "uniform":
+        return lambda rng: max(1, int(rng.uniform(values[0], values[1] + 1)))
+    if kind == "lognormal":
+        return lambda rng: max(1, int(round(rng.lognormvariate(values[0], values[1]))))
+    raise ValueError(f"Unsupported distribution: {spec}")
+
+def synthesize_requests(count, doc_count="lognormal:3.0,0.8", doc_words="lognormal:4.5,0.7", top_k=3, seed=0):
+    """
+    Synthetic requests in the test_endpoint payload shape
+
+    Args:
+        count (int): Number of requests
+        doc_count (str): Distribution of documents per request
+        doc_words (str): Distribution of words per document
+        top_k (int): top_k of every request
+        seed (int): Random seed
+    """
+    rng = random.Random(seed)
+    sample_count = parse_distribution(doc_count)
+    sample_words = parse_distribution(doc_words)
+    return [
+        {
+            "query": " ".join(rng.choices(VOCABULARY, k=rng.randint(3, 12))),
+            "documents": [" ".join(rng.choices(VOCABULARY, k=sample_words(rng))) for _ in range(sample_count(rng))],
+            "top_k": top_k
+        }
+        for _ in range(count)
+    ]
+
+def load_request_log(path):
+    """
+    Read recorded requests; an optional "timestamp" field (epoch seconds) keeps the recorded rate
+    """
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def schedule(requests, qps=None, rate_multiplier=None, arrival="poisson", seed=0):
+    """
+    Intended send offsets (seconds from the start) of every request
+
+    Either a target rate (Poisson or evenly spaced arrivals) or the recorded
+    timestamps compressed by rate_multiplier, which requires a "timestamp" on
+    every request (ValueError otherwise).
+    """
+    if rate_multiplier is not None:
+        missing = sum(1 for request in requests if "timestamp" not in request)
+        if missing:
+            raise ValueError(
+                f"{missing} of {len(requests)} requests have no timestamp to replay; schedule them at a target rate (qps) instead"
+            )
+        timestamps = [request["timestamp"] for request in requests]
+        return [(timestamp - timestamps[0]) / rate_multiplier for timestamp in timestamps]
+    if arrival == "poisson":
+        gaps = np.random.default_rng(seed).exponential(1.0 / qps, len(requests))
+        return list(np.cumsum(gaps) - gaps[0])
+    return [i / qps for i in range(len(requests))]
+
+def run_load(requests, offsets, invoke, endpoint_name, concurrency=64):
+    """
+    Send requests open-loop at their intended offsets and record their timings
+
+    Sends are never delayed by slow responses. If every sender thread is busy,
+    requests queue up, and that wait still counts, because latency is measured
+    from the intended send time (coordinated-omission correction).
+
+    Returns:
+        list: {"intended", "sent", "done", "error"} per request, in seconds from the start
+    """
+    records = [None] * len(requests)
+
+    def send(i, intended, start):
+        sent = time.perf_counter() - start
+        error = None
+        try:
+            response = invoke(endpoint_name, {k: v for k, v in requests[i].items() if k != "timestamp"})
+            if isinstance(response, dict) and "error" in response:
+                error = response["error"]
+        except Exception as exception:
+            error = f"{type(exception).__name__}: {exception}"
+        records[i] = {"intended": intended, "sent": sent, "done": time.perf_counter() - start, "error": error}
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        start = time.perf_counter()
+        for i, intended in enumerate(offsets):
+            delay = intended - (time.perf_counter() - start)
+            if delay > 0:
+                time.sleep(delay)
+            executor.submit(send, i, intended, start)
+    return records
+
+def latency_percentiles(latencies):
+    report = {f"p{p}": float(np.percentile(latencies, p)) for p in PERCENTILES}
+    report["max"] = float(latencies.max())
+    return report
+
+def summarize(records, requests):
+    """
+    Latency percentiles (ms), throughput and error rate of a load run
+
+    corrected_ms is measured from the intended send time, service_ms from the
+    actual one; the gap between them is time spent queued in the generator.
+    """
+    done = np.array([record["done"] for record in records])
+    corrected = 1000 * (done - np.array([record["intended"] for record in records]))
+    service = 1000 * (done - np.array([record["sent"] for record in records]))
+    errors = [record["error"] for record in records if record["error"] is not None]
+    duration = float(done.max() - min(record["intended"] for record in records))
+    offered = (len(records) - 1) / max(records[-1]["intended"], 1e-9) if len(records) > 1 else 0.0
+
+    return {
+        "requests": len(records),
+        "pairs": sum(len(request.get("documents", [])) for request in requests),
+        "offered_qps": offered,
+        "throughput_qps": len(records) / max(duration, 1e-9),
+        "error_rate": len(errors) / len(records),
+        "errors": sorted(set(errors))[:5],
+        "corrected_ms": latency_percentiles(corrected),
+        "service_ms": latency_percentiles(service)
+    }
+
+# Example usage
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Open-loop load generator for the rerank endpoint")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--requests", help="Recorded JSONL requests in the test_endpoint payload shape")
+    source.add_argument("--synthetic", type=int, help="Number of synthetic requests to generate")
+    parser.add_argument("--doc-count", default="lognormal:3.0,0.8", help="Synthetic documents per request")
+    parser.add_argument("--doc-words", default="lognormal:4.5,0.7", help="Synthetic words per document")
+    rate = parser.add_mutually_exclusive_group(required=True)
+    rate.add_argument("--qps", type=float, help="Target request rate")
+    rate.add_argument("--rate-multiplier", type=float, help="Replay recorded timestamps this many times faster")
+    parser.add_argument("--arrival", choices=["poisson", "uniform"], default="poisson")
+    parser.add_argument("--endpoint", default=None, help="SageMaker endpoint name (omit to serve in-process)")
+    parser.add_argument("--model-dir", default="/opt/ml/model", help="Directory passed to model_fn when serving locally")
+    parser.add_argument("--concurrency", type=int, default=64, help="Maximum requests in flight")
+    parser.add_argument("--output", default=None, help="Write the report and per-request timings as JSON")
+    args = parser.parse_args()
+    if args.synthetic and args.rate_multiplier:
+        parser.error("--rate-multiplier replays recorded timestamps; synthetic requests need --qps")
+
+    requests = load_request_log(args.requests) if args.requests else synthesize_requests(
+        args.synthetic, args.doc_count, args.doc_words
+    )
+    try:
+        offsets = schedule(requests, args.qps, args.rate_multiplier, args.arrival)
+    except ValueError as error:
+        parser.error(str(error))
+
+    if args.endpoint:
+        endpoint_name, invoke = args.endpoint, sagemaker_invoke
+    else:
+        handler = load_handler()
+        endpoint_name, invoke = "local", local_invoke({"local": (handler, handler.model_fn(args.model_dir))})
+
+    records = run_load(requests, offsets, invoke, endpoint_name, args.concurrency)
+    report = summarize(records, requests)
+    print(json.dumps(report, indent=2))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"report": report, "records": records}, f)
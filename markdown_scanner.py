@@ -0,0 +1,119 @@
+import re
+from typing import Iterator, Optional, Tuple, Union
+
+Buffer = Union[str, bytes, bytearray, memoryview]
+
+# One alternative per block kind. A table is a header row starting with |,
+# a separator row starting with | and containing "---" and any following rows
+# starting with |; rows without that header are "table_rows" (typically a
+# table continued from the previous chunk). Blocks start at column 0.
+_BLOCK_PATTERN = (
+    r"(?P<table>\|[^\n]*\n\|[^\n]*---[^\n]*(?:\n\|[^\n]*)*)"
+    r"|(?P<table_rows>\|[^\n]*(?:\n\|[^\n]*)*)"
+    r"|(?P<heading>#{1,6}[ \t]+\S[^\n]*)"
+)
+_TABLE_PATTERN = r"(?P<header>\|[^\n]*)\n(?P<separator>\|[^\n]*---[^\n]*)(?P<rows>(?:\n\|[^\n]*)*)"
+
+def _compile(pattern: str):
+    """
+    (pattern at a line start, pattern after a line break) for str and bytes
+    """
+    anchored = "(?:%s)" % pattern
+    return {
+        str: (re.compile(anchored), re.compile("\n" + anchored)),
+        bytes: (re.compile(anchored.encode()), re.compile(("\n" + anchored).encode())),
+    }
+
+_BLOCKS = _compile(_BLOCK_PATTERN), "|#"
+_TABLES = _compile(_TABLE_PATTERN), "|"
+
+def _finditer(patterns, buffer: Buffer, start: int, end: Optional[int]):
+    """
+    Matches of a block pattern at line starts between start and end
+
+    str, bytes and bytearray buffers are searched with find() for the
+    characters a block can start with (memchr, so prose costs next to nothing),
+    and the pattern is only tried where such a character starts a line.
+    memoryviews have no find() and are searched with the pattern preceded by a
+    literal line break, which the regex engine also skips to quickly.
+    """
+    compiled, markers = patterns
+    is_str = isinstance(buffer, str)
+    at_line_start, after_newline = compiled[str if is_str else bytes]
+    end = len(buffer) if end is None else end
+
+    if isinstance(buffer, memoryview):
+        match = at_line_start.match(buffer, start, end)
+        if match:
+            yield match
+            start = match.end()
+        yield from after_newline.finditer(buffer, start, end)
+        return
+
+    newline = "\n" if is_str else b"\n"
+    markers = markers if is_str else [marker.encode() for marker in markers]
+    next_marker = {marker: buffer.find(marker, start, end) for marker in markers}
+    while True:
+        found = [position for position in next_marker.values() if position >= 0]
+        if not found:
+            return
+        position = min(found)
+        resume = position + 1
+        if position == start or buffer[position - 1:position] == newline:
+            match = at_line_start.match(buffer, position, end)
+            if match:
+                yield match
+                resume = match.end()
+        for marker, marker_position in next_marker.items():
+            if 0 <= marker_position < resume:
+                next_marker[marker] = buffer.find(marker, resume, end)
+
+def scan_blocks(buffer: Buffer, start: int = 0, end: Optional[int] = None) -> Iterator[Tuple[str, int, int]]:
+    """
+    Find tables and headings in a whole document or chunk buffer.
+
+    The scan jumps between line starts holding a | or a #, so prose is
+    skipped in C and Python code only runs at those structural boundaries.
+    Offsets are characters for str and bytes for bytes-like buffers
+    (bytes, bytearray, memoryview), which are scanned without copying.
+    Fenced code blocks are not treated specially.
+
+    Args:
+        buffer: Markdown text
+        start: Offset to start scanning at (should be a line start)
+        end: Offset to stop scanning at (defaults to the end of the buffer)
+
+    Yields:
+        (kind, start, end) per block, kind being "table", "table_rows" or
+        "heading"; the span covers the block without its last line break
+    """
+    for match in _finditer(_BLOCKS, buffer, start, end):
+        kind = match.lastgroup
+        yield kind, match.start(kind), match.end(kind)
+
+def iter_tables(buffer: Buffer, start: int = 0, end: Optional[int] = None) -> Iterator[Tuple[int, int, int, int]]:
+    """
+    Find the tables (header row, separator row and body) of a buffer.
+
+    Uses the same table definition as scan_blocks, with a pattern that only
+    looks for tables.
+
+    Args:
+        buffer: Markdown text (str or bytes-like)
+        start: Offset to start scanning at (should be a line start)
+        end: Offset to stop scanning at (defaults to the end of the buffer)
+
+    Yields:
+        (start, header_end, separator_end, end) per table: the header row is
+        buffer[start:header_end], the separator row buffer[header_end + 1:separator_end]
+        and the body rows buffer[separator_end + 1:end]
+    """
+    for match in _finditer(_TABLES, buffer, start, end):
+        yield match.start("header"), match.end("header"), match.end("separator"), match.end("rows")
+
+def first_line(buffer: str) -> str:
+    """
+    First line of a text, without splitting the rest of it
+    """
+    newline = buffer.find("\n")
+    return buffer if newline < 0 else buffer[:newline]
@@ -1,5 +1,10 @@
+import atexit
+import os
 from chonkie.chunkers import RecursiveChunker
 from chonkie.rules import RecursiveRules, RecursiveLevel
+from chunk_cache import ChunkCache
+from token_count_cache import TokenCountCache, tokenizer_name
+from token_estimator import TokenEstimator
 
 # Optimized rules for better context retention between headers and subheaders
 rules = RecursiveRules(
@@ -38,3 +43,34 @@ chunker = RecursiveChunker(
     # Optionally add a separator to clearly mark where chunks were split
     separator="\n---\n"
 )
+
+# Share token counts of recurring splits (disclaimers, table headers, footers)
+# across documents, and across runs when TOKEN_COUNT_CACHE points to a file
+# (loaded here, saved when the process exits)
+token_count_cache = TokenCountCache(
+    tokenizer_name=tokenizer_name(chunker.tokenizer),
+    path=os.environ.get("TOKEN_COUNT_CACHE")
+)
+token_count_cache.attach(chunker)
+if token_count_cache.path:
+    atexit.register(token_count_cache.save)
+
+# Estimate token counts of splits far from the chunk size instead of tokenizing
+# them, with a calibration fitted by evaluate-approximate-token-counts.py
+if os.environ.get("TOKEN_ESTIMATE_CALIBRATION"):
+    token_estimator = TokenEstimator(chunker.tokenizer.count_tokens_batch)
+    token_estimator.load(os.environ["TOKEN_ESTIMATE_CALIBRATION"])
+    token_estimator.attach(chunker)
+
+# Skip chunking and post-processing of documents already chunked with these
+# rules when CHUNK_CACHE_DIR points to a cache directory
+chunk_cache = ChunkCache(os.environ["CHUNK_CACHE_DIR"]) if os.environ.get("CHUNK_CACHE_DIR") else None
+
+def chunk_document(text, post_processor=None):
+    """
+    Chunk a document with the rules above, then apply post_processor (e.g. process_chunks)
+    """
+    if chunk_cache is not None:
+        return chunk_cache.chunk(text, chunker, post_processor)
+    chunks = [getattr(chunk, "text", chunk) for chunk in chunker(text)]
+    return post_processor(chunks) if post_processor else chunks
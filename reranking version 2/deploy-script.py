@@ -37,7 +37,8 @@ def deploy_reranker_model(
     if model_environment is None:
         model_environment = {
             "SAGEMAKER_CONTAINER_LOG_LEVEL": "20",
-            "SAGEMAKER_PROGRAM": "inference.py"
+            "SAGEMAKER_PROGRAM": "inference.py",
+            "MAX_SEQUENCE_LENGTH": "512"
         }
     
     # Create a SageMaker session
@@ -11,7 +11,8 @@ def model_fn(model_dir):
     print(f"Loading model from {model_dir}")
     # Load the model - you can either use the local files or the HF model name
     # If you've included the model files in your tar.gz, use:
-    model = MxbaiRerankV2(model_dir)
+    max_length = int(os.environ.get("MAX_SEQUENCE_LENGTH", "512"))
+    model = MxbaiRerankV2(model_dir, max_length=max_length)
     # If you want to download from HF:
     # model = MxbaiRerankV2("mixedbread-ai/mxbai-rerank-base-v2")
     return model
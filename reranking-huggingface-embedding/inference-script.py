@@ -6,6 +6,7 @@ from mxbai_rerank import MxbaiRerankV2
 # Load the model once when the container starts
 model = None
 device = "cuda" if torch.cuda.is_available() else "cpu"
+max_sequence_length = int(os.environ.get("MAX_SEQUENCE_LENGTH", "512"))
 
 def model_fn(model_dir):
     """
@@ -17,11 +18,11 @@ def model_fn(model_dir):
     model_path = os.path.join(model_dir, "model")
     if os.path.exists(model_path):
         print(f"Loading model from local path: {model_path}")
-        model = MxbaiRerankV2(model_path)
+        model = MxbaiRerankV2(model_path, max_length=max_sequence_length)
     else:
         # Fall back to loading from Hugging Face Hub
         print("Loading model from Hugging Face Hub")
-        model = MxbaiRerankV2("mixedbread-ai/mxbai-rerank-base-v2")
+        model = MxbaiRerankV2("mixedbread-ai/mxbai-rerank-base-v2", max_length=max_sequence_length)
     
     return model
 
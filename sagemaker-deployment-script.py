@@ -47,7 +47,9 @@ def deploy_rerank_model(
     env = {
         'MODEL_NAME': 'mixedbread-ai/mxbai-rerank-base-v2',
         'MODEL_CACHE_DIR': '/opt/ml/model',
-        'TRANSFORMERS_CACHE': '/opt/ml/model'
+        'TRANSFORMERS_CACHE': '/opt/ml/model',
+        'MAX_SEQUENCE_LENGTH': '512',
+        'MAX_REQUEST_TOKENS': '65536'
     }
     
     # Create the model
@@ -0,0 +1,185 @@
+import heapq
+import itertools
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# SageMaker rejects request payloads over 6 MB; keep some headroom for the query and JSON
+MAX_PAYLOAD_BYTES = 5_500_000
+
+def sagemaker_invoke(endpoint_name, payload, runtime=None):
+    """
+    Send one rerank payload to a SageMaker endpoint and return the parsed response
+    """
+    if runtime is None:
+        import boto3
+        runtime = boto3.client('sagemaker-runtime')
+
+    response = runtime.invoke_endpoint(
+        EndpointName=endpoint_name,
+        ContentType='application/json',
+        Body=json.dumps(payload)
+    )
+    return json.loads(response['Body'].read().decode())
+
+def local_invoke(endpoints):
+    """
+    Build an invoke function backed by in-process handlers instead of real endpoints
+
+    Calls that share a model object are serialized, as the tokenizer is not
+    thread-safe; a real endpoint instance would run them in its own process.
+    Handlers with their own model_lock serialize (and admit) requests themselves.
+
+    Args:
+        endpoints (dict): Endpoint name -> (handler module, model) stand-ins
+
+    Returns:
+        callable: invoke(endpoint_name, payload) with the same contract as sagemaker_invoke
+    """
+    locks = {id(model): threading.Lock() for _, model in endpoints.values()}
+
+    def invoke(endpoint_name, payload):
+        handler, model = endpoints[endpoint_name]
+        input_data = handler.input_fn(json.dumps(payload), 'application/json')
+        if hasattr(handler, 'model_lock'):
+            prediction = handler.predict_fn(input_data, model)
+        else:
+            with locks[id(model)]:
+                prediction = handler.predict_fn(input_data, model)
+        body = handler.output_fn(prediction, 'application/json')
+        if isinstance(body, tuple):
+            body = body[0]
+        return json.loads(body)
+
+    return invoke
+
+def shard_documents(documents, num_shards, max_payload_bytes=MAX_PAYLOAD_BYTES):
+    """
+    Split documents into contiguous shards of roughly equal count that each fit the payload limit
+
+    Returns:
+        list: (offset, documents) tuples
+    """
+    target = max(1, -(-len(documents) // num_shards))
+    shards = []
+    start = 0
+    size = 0
+    for i, document in enumerate(documents):
+        document_bytes = len(json.dumps(document))
+        if i > start and (i - start >= target or size + document_bytes > max_payload_bytes):
+            shards.append((start, documents[start:i]))
+            start = i
+            size = 0
+        size += document_bytes
+    if start < len(documents):
+        shards.append((start, documents[start:]))
+    return shards
+
+def _parse_results(response):
+    """
+    Accept the response shapes of all handlers: a bare list or {"results": [...]}
+    """
+    if isinstance(response, dict):
+        if 'error' in response:
+            raise RuntimeError(response['error'])
+        response = response['results']
+    return response
+
+def scatter_gather_rerank(
+    query,
+    documents,
+    endpoint_names,
+    top_k=3,
+    num_shards=None,
+    return_documents=True,
+    invoke=None,
+    max_workers=None,
+    max_payload_bytes=MAX_PAYLOAD_BYTES,
+    **request_options
+):
+    """
+    Rerank a large candidate list by sharding it across concurrent endpoint calls
+
+    Each shard returns its own top_k, which is all the global top_k can draw
+    from, and the sorted partial lists are combined with a k-way heap merge.
+    Fewer than top_k results are returned when the shards' cutoffs leave fewer.
+
+    Args:
+        query (str): Query text
+        documents (list): Candidate documents
+        endpoint_names (str or list): One endpoint, or several to spread shards over
+        top_k (int): Number of results to return
+        num_shards (int): Number of sub-requests (defaults to one per endpoint)
+        return_documents (bool): Whether to include the documents in the results
+        invoke (callable): invoke(endpoint_name, payload) (defaults to sagemaker_invoke)
+        max_workers (int): Concurrent sub-requests (defaults to the number of shards)
+        max_payload_bytes (int): Upper bound on the documents' JSON size per sub-request
+        **request_options: Extra request fields such as mode, max_length or
+            min_score; relative_gap is applied to the merged results, from the
+            global best score
+
+    Returns:
+        list: Global top_k results with indices into the original documents
+    """
+    if isinstance(endpoint_names, str):
+        endpoint_names = [endpoint_names]
+    invoke = invoke or sagemaker_invoke
+    if not documents:
+        return []
+    # Each shard only knows its own best score
+    relative_gap = request_options.pop('relative_gap', None)
+
+    shards = shard_documents(documents, num_shards or len(endpoint_names), max_payload_bytes)
+
+    def send(shard_number, offset, shard):
+        payload = dict(
+            request_options,
+            query=query,
+            documents=shard,
+            top_k=min(top_k, len(shard)),
+            return_documents=False
+        )
+        results = _parse_results(invoke(endpoint_names[shard_number % len(endpoint_names)], payload))
+        # Map shard-local indices back to the original list
+        return sorted(
+            ((result['score'], offset + result['index']) for result in results),
+            key=lambda item: (-item[0], item[1])
+        )
+
+    with ThreadPoolExecutor(max_workers=max_workers or len(shards)) as executor:
+        futures = [executor.submit(send, n, offset, shard) for n, (offset, shard) in enumerate(shards)]
+        partial_results = [future.result() for future in futures]
+
+    merged = heapq.merge(*partial_results, key=lambda item: (-item[0], item[1]))
+    top = list(itertools.islice(merged, top_k))
+    if relative_gap is not None and top:
+        top = [(score, index) for score, index in top if score >= top[0][0] - relative_gap]
+    return [
+        {
+            'index': index,
+            'score': score,
+            'document': documents[index] if return_documents else None
+        }
+        for score, index in top
+    ]
+
+# Example usage
+if __name__ == "__main__":
+    query = "Who wrote 'To Kill a Mockingbird'?"
+    documents = [
+        "'To Kill a Mockingbird' is a novel by Harper Lee published in 1960. It was immediately successful, winning the Pulitzer Prize, and has become a classic of modern American literature.",
+        "The novel 'Moby-Dick' was written by Herman Melville and first published in 1851. It is considered a masterpiece of American literature and deals with complex themes of obsession, revenge, and the conflict between good and evil.",
+        "Harper Lee, an American novelist widely known for her novel 'To Kill a Mockingbird', was born in 1926 in Monroeville, Alabama. She received the Pulitzer Prize for Fiction in 1961.",
+        "Jane Austen was an English novelist known primarily for her six major novels, which interpret, critique and comment upon the British landed gentry at the end of the 18th century.",
+        "The 'Harry Potter' series, which consists of seven fantasy novels written by British author J.K. Rowling, is among the most popular and critically acclaimed books of the modern era.",
+        "'The Great Gatsby', a novel written by American author F. Scott Fitzgerald, was published in 1925. The story is set in the Jazz Age and follows the life of millionaire Jay Gatsby and his pursuit of Daisy Buchanan."
+    ]
+
+    results = scatter_gather_rerank(
+        query,
+        documents,
+        endpoint_names="mxbai-rerank-endpoint",
+        top_k=3,
+        num_shards=2
+    )
+    print(json.dumps(results, indent=2))
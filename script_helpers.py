@@ -0,0 +1,57 @@
+import importlib.util
+import os
+import random
+import time
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Small banking vocabulary for synthetic queries and documents
+VOCABULARY = (
+    "fixed deposit interest rate senior citizen tenure months years premature withdrawal "
+    "penalty savings account bank loan amount minimum maximum per annum payout quarterly "
+    "monthly cumulative scheme eligibility resident nri tax deduction source"
+).split()
+
+def load_script(name):
+    """
+    Load a script as a module (hyphenated file names are not importable)
+
+    Args:
+        name (str): File name of a script in this directory, or a path to one
+    """
+    path = os.path.join(SCRIPT_DIR, name)
+    spec = importlib.util.spec_from_file_location(os.path.basename(path).replace("-", "_")[:-3], path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def load_handler(path=None):
+    """
+    Load inference-script.py, or the handler script at path, as a module
+    """
+    return load_script(path or "inference-script.py")
+
+def random_text(words, seed):
+    """
+    Text of the given number of random vocabulary words
+    """
+    rng = random.Random(seed)
+    return " ".join(rng.choices(VOCABULARY, k=words))
+
+def synthetic_documents(count, min_words=20, max_words=300, seed=0):
+    """
+    Random documents of varying length over the vocabulary
+    """
+    rng = random.Random(seed)
+    return [" ".join(rng.choices(VOCABULARY, k=rng.randint(min_words, max_words))) for _ in range(count)]
+
+def timed(function, repeats):
+    """
+    Run function repeats times and return (last result, fastest seconds)
+    """
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+    return result, best
@@ -0,0 +1,75 @@
+import argparse
+import json
+import os
+
+import numpy as np
+
+from script_helpers import load_script
+
+def simulate_routing(handler, load_generator, model, qps, count, latency_budget_ms=None, doc_count="uniform:10,40"):
+    """
+    Replay synthetic traffic against the in-process handler and report routing outcomes
+
+    Returns:
+        dict: Throughput, share of requests per route, share of requests that met
+        the latency budget (intended send to completion), and per-route metrics
+    """
+    requests = load_generator.synthesize_requests(count, doc_count, "uniform:20,60")
+    if latency_budget_ms is not None:
+        for request in requests:
+            request["latency_budget_ms"] = latency_budget_ms
+
+    for route in handler.routes.values():
+        route.requests = 0
+        route.pairs = 0
+        route.latencies.clear()
+
+    offsets = load_generator.schedule(requests, qps=qps)
+    records = load_generator.run_load(requests, offsets, load_generator.local_invoke({"local": (handler, model)}), "local", concurrency=256)
+    report = load_generator.summarize(records, requests)
+    latencies = 1000 * np.array([record["done"] - record["intended"] for record in records])
+
+    metrics = handler.route_metrics()["routes"]
+    return {
+        "qps": qps,
+        "latency_budget_ms": latency_budget_ms,
+        "throughput_qps": report["throughput_qps"],
+        "error_rate": report["error_rate"],
+        "corrected_p99_ms": report["corrected_ms"]["p99"],
+        "within_budget": float(np.mean(latencies <= latency_budget_ms)) if latency_budget_ms else None,
+        "route_share": {name: route["requests"] / len(records) for name, route in metrics.items()},
+        "routes": metrics
+    }
+
+# Example usage
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline simulation of SLA-aware routing between two rerank models")
+    parser.add_argument("--base-model", default=None, help="Slower model (name or local path); stand-ins are used if omitted")
+    parser.add_argument("--small-model", default=None, help="Faster model (name or local path)")
+    parser.add_argument("--base-ms-per-token", type=float, default=0.05, help="Stand-in base model speed")
+    parser.add_argument("--small-ms-per-token", type=float, default=0.01, help="Stand-in small model speed")
+    parser.add_argument("--qps", type=float, nargs="+", default=[2, 5, 10])
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--latency-budget-ms", type=float, default=500)
+    args = parser.parse_args()
+    if bool(args.base_model) != bool(args.small_model):
+        parser.error("--base-model and --small-model go together")
+
+    # The handler reads its model names when it is loaded
+    os.environ["MODEL_NAME"] = args.base_model or "stand-in-base"
+    os.environ["SMALL_MODEL_NAME"] = args.small_model or "stand-in-small"
+    handler = load_script("inference-script.py")
+    load_generator = load_script("load-generator.py")
+    if not args.base_model:
+        # Test doubles, not deployed with the handler
+        from tests.stand_ins import StandInReranker, use_stand_ins
+        use_stand_ins(handler, {
+            "stand-in-base": StandInReranker("stand-in-base", args.base_ms_per_token),
+            "stand-in-small": StandInReranker("stand-in-small", args.small_ms_per_token)
+        })
+    model = handler.model_fn("/opt/ml/model")
+
+    for qps in args.qps:
+        for latency_budget_ms in (None, args.latency_budget_ms):
+            report = simulate_routing(handler, load_generator, model, qps, args.requests, latency_budget_ms)
+            print(json.dumps(report, indent=2))
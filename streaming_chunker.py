@@ -0,0 +1,118 @@
+import re
+from typing import Callable, Iterable, Iterator, List, Optional, TextIO, Union
+
+def heading_levels_from_rules(rules) -> int:
+    """
+    Deepest heading level used as a delimiter by the first RecursiveLevel.
+
+    With the rules in optimized-chunking-rules.py (["#", "##"]) this is 2, so
+    sections are cut at H1 and H2 headings only.
+
+    Args:
+        rules: chonkie RecursiveRules
+
+    Returns:
+        Heading level to cut at, 2 if the first level does not split on headings
+    """
+    delimiters = rules.levels[0].delimiters or []
+    if isinstance(delimiters, str):
+        delimiters = [delimiters]
+    levels = [len(delimiter) for delimiter in delimiters if set(delimiter) == {"#"}]
+    return max(levels) if levels else 2
+
+def iter_sections(
+    lines: Iterable[str],
+    heading_levels: int = 2,
+    max_section_chars: int = 4_000_000
+) -> Iterator[str]:
+    """
+    Group lines of a markdown stream into top-level sections.
+
+    A section starts at every heading of level heading_levels or above, except
+    inside fenced code blocks. Sections larger than max_section_chars are cut at
+    the next blank line (or, past twice the limit, at the next line) so that a
+    single huge section cannot hold the whole file in memory.
+
+    Args:
+        lines: Lines of the document, with their line endings
+        heading_levels: Deepest heading level that starts a new section
+        max_section_chars: Soft size limit of a section
+
+    Yields:
+        Section text
+    """
+    heading = re.compile(r"#{1,%d}\s" % heading_levels)
+    buffer: List[str] = []
+    size = 0
+    in_fence = False
+
+    for line in lines:
+        if line.lstrip().startswith("```"):
+            in_fence = not in_fence
+
+        starts_section = not in_fence and heading.match(line) is not None
+        oversized = size >= max_section_chars and (not line.strip() or size >= 2 * max_section_chars)
+
+        if buffer and (starts_section or oversized):
+            yield "".join(buffer)
+            buffer = []
+            size = 0
+
+        buffer.append(line)
+        size += len(line)
+
+    if buffer:
+        yield "".join(buffer)
+
+def stream_chunks(
+    source: Union[str, TextIO],
+    chunker,
+    post_processor: Optional[Callable[[List[str]], List[str]]] = None,
+    heading_levels: Optional[int] = None,
+    max_section_chars: int = 4_000_000
+) -> Iterator[str]:
+    """
+    Chunk a large markdown file section by section and yield chunks lazily.
+
+    Only one section and its chunks are resident at a time, so peak memory is
+    bounded by the largest section rather than by the file. The post-processor
+    (e.g. process_chunks from deepseek-example.py or fully-fixed-table-processor.py)
+    runs per section; the last processed chunk of the previous section is passed
+    in front of each batch so open table and list context carries across the cut,
+    and its output is dropped.
+
+    Args:
+        source: Path to a markdown file or an open text stream
+        chunker: Configured chonkie RecursiveChunker
+        post_processor: Optional list -> list chunk post-processor
+        heading_levels: Deepest heading level to cut at, taken from the chunker rules if omitted
+        max_section_chars: Soft size limit of a section
+
+    Yields:
+        Chunk texts
+    """
+    if heading_levels is None:
+        heading_levels = heading_levels_from_rules(chunker.rules)
+
+    stream = open(source, encoding="utf-8") if isinstance(source, str) else source
+    try:
+        previous = None
+        for section in iter_sections(stream, heading_levels, max_section_chars):
+            chunks = [getattr(chunk, "text", chunk) for chunk in chunker(section)]
+            if not chunks:
+                continue
+
+            if post_processor is None:
+                yield from chunks
+                continue
+
+            if previous is None:
+                processed = post_processor(chunks)
+            else:
+                processed = post_processor([previous] + chunks)[1:]
+
+            previous = processed[-1]
+            yield from processed
+    finally:
+        if stream is not source:
+            stream.close()
@@ -1,7 +1,9 @@
 import re
 from typing import List, Dict, Tuple, Optional
+from markdown_scanner import first_line
+from table_context_refs import add_table_context, materialize_chunks, table_context_savings
 
-def process_markdown_chunks(chunks: List[str]) -> List[str]:
+def process_markdown_chunks(chunks: List[str], context_store: Optional[Dict[int, str]] = None) -> List[str]:
     """
     Process markdown chunks to preserve table context across chunks.
     
@@ -11,6 +13,9 @@ def process_markdown_chunks(chunks: List[str]) -> List[str]:
     
     Args:
         chunks: List of markdown text chunks
+        context_store: Optional table ID -> context dictionary. When given, the
+            context is recorded there once and continuation chunks only carry a
+            reference line (see table_context_refs.materialize_table_context)
         
     Returns:
         List of processed chunks with table context preserved
@@ -40,11 +45,19 @@ def process_markdown_chunks(chunks: List[str]) -> List[str]:
             # Add the table headers
             context_to_add += "\n".join(table_headers) + "\n"
             
+            # Store the context once and reference it instead of copying it
+            if context_store is not None:
+                context_to_add = add_table_context(context_to_add[:-1], context_store) + "\n"
+            
             # Add the enhanced context to the beginning of the second chunk
             processed_chunks[i + 1] = context_to_add + next_chunk
     
     return processed_chunks
 
+# A line with a | followed by a table separator line (| --- |), found in one
+# search over the whole chunk instead of a loop over its lines
+TABLE_HEADER = re.compile(r'^([^\n]*\|[^\n]*)\n([^\n]*\| *--- *\|[^\n]*)', re.M)
+
 def extract_table_headers(chunk: str) -> List[str]:
     """
     Extract the table headers (column headers and separator line) from a chunk.
@@ -55,12 +68,10 @@ def extract_table_headers(chunk: str) -> List[str]:
     Returns:
         List of strings containing the header row and separator row, or empty list if not found
     """
-    lines = chunk.split('\n')
-    for i in range(len(lines) - 1):
-        # Check for a table separator line (| --- | --- |)
-        if '|' in lines[i] and re.search(r'\| *--- *\|', lines[i + 1]):
-            # Return the header row and the separator row
-            return [lines[i], lines[i + 1]]
+    match = TABLE_HEADER.search(chunk)
+    if match:
+        # Return the header row and the separator row
+        return [match.group(1), match.group(2)]
     return []
 
 def is_table_continuation(chunk: str) -> bool:
@@ -76,12 +87,12 @@ def is_table_continuation(chunk: str) -> bool:
     if not chunk:
         return False
         
-    lines = chunk.split('\n')
+    line = first_line(chunk)
     
     # Check if the first line is a table row but not a header or separator
-    if lines and '|' in lines[0]:
+    if '|' in line:
         # Make sure it's not a separator line (| --- |)
-        if not re.search(r'\| *--- *\|', lines[0]):
+        if not re.search(r'\| *--- *\|', line):
             return True
             
     return False
@@ -96,33 +107,26 @@ def extract_table_description(chunk: str) -> str:
     Returns:
         String containing the table description or empty string if not found
     """
-    lines = chunk.split('\n')
-    
     # Find where the table starts (header line)
-    table_start_idx = -1
-    for i in range(len(lines) - 1):
-        if '|' in lines[i] and re.search(r'\| *--- *\|', lines[i + 1]):
-            table_start_idx = i
-            break
-            
-    if table_start_idx <= 0:
+    match = TABLE_HEADER.search(chunk)
+    if not match or match.start() == 0:
         return ""
         
-    # Work backwards from the table header to find the description
-    description_lines = []
-    idx = table_start_idx - 1
-    
-    # Collect lines above the table
-    while idx >= 0 and lines[idx].strip():
-        description_lines.insert(0, lines[idx])
-        idx -= 1
+    # Work backwards from the table header, one line at a time, to the first blank line
+    description_end = match.start() - 1
+    description_start = description_end + 1
+    while description_start > 0:
+        line_start = chunk.rfind('\n', 0, description_start - 1) + 1
+        if not chunk[line_start:description_start - 1].strip():
+            break
+        description_start = line_start
     
     # If we didn't find any description, return empty string
-    if not description_lines:
+    if description_start > description_end:
         return ""
         
     # Return the description as a single string
-    return "\n".join(description_lines)
+    return chunk[description_start:description_end]
 
 # Example of how to use the functions
 def main():
@@ -165,6 +169,14 @@ IDFC FIRST Bank offers the best Fixed Deposit rates for general and senior citiz
     print("PROCESSED CHUNK 2:")
     print(processed_chunks[1])
     
+    # Same chunks with the table context stored once by reference
+    context_store = {}
+    referenced_chunks = process_markdown_chunks([chunk1, chunk2], context_store)
+    print("\nREFERENCED CHUNK 2:")
+    print(referenced_chunks[1])
+    print(table_context_savings(referenced_chunks, context_store))
+    assert materialize_chunks(referenced_chunks, context_store) == processed_chunks
+    
     return processed_chunks
 
 if __name__ == "__main__":
@@ -0,0 +1,90 @@
+import hashlib
+import re
+from typing import Callable, Dict, List, Optional
+
+# Line standing in for a table's title/header/separator inside a chunk
+CONTEXT_REFERENCE = "<<table-context:{table_id}>>"
+CONTEXT_REFERENCE_PATTERN = re.compile(r"<<table-context:(\d+)>>")
+
+def table_id_for(context: str) -> int:
+    """
+    Table ID derived from the context itself, so identical headers share one entry.
+
+    IDs are non-negative int64 values, the type of the chunk store's table_id
+    column, where -1 means no table.
+    """
+    digest = hashlib.blake2b(context.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big") >> 1
+
+def referenced_table_id(chunk: str) -> int:
+    """
+    ID of the first table context a chunk references, -1 if none (as stored by ChunkStoreWriter).
+    """
+    match = CONTEXT_REFERENCE_PATTERN.search(chunk)
+    return int(match.group(1)) if match else -1
+
+def add_table_context(context: str, context_store: Dict[int, str]) -> str:
+    """
+    Record table context once and return the reference line to put in its place.
+
+    Args:
+        context: Table title, header row and separator row as they would be prepended
+        context_store: Side dictionary of table ID -> context
+
+    Returns:
+        Reference line for the chunk
+    """
+    table_id = table_id_for(context)
+    context_store.setdefault(table_id, context)
+    return CONTEXT_REFERENCE.format(table_id=table_id)
+
+def materialize_table_context(chunk: str, context_store: Dict[int, str]) -> str:
+    """
+    Replace table context references with the context text, at embed/rerank time.
+    """
+    return CONTEXT_REFERENCE_PATTERN.sub(lambda match: context_store[int(match.group(1))], chunk)
+
+def materialize_chunks(chunks: List[str], context_store: Dict[int, str]) -> List[str]:
+    """
+    Materialize a list of chunks, e.g. right before embedding or building a rerank request.
+    """
+    return [materialize_table_context(chunk, context_store) for chunk in chunks]
+
+def table_context_savings(
+    chunks: List[str],
+    context_store: Dict[int, str],
+    count_tokens: Optional[Callable[[str], int]] = None
+) -> Dict[str, int]:
+    """
+    Report how many tokens storing table context by reference saves.
+
+    Args:
+        chunks: Chunks holding references
+        context_store: Side dictionary the references point to
+        count_tokens: Token counter of the embedding/rerank model (whitespace words if omitted)
+
+    Returns:
+        Dictionary with reference counts and token totals with and without dedup
+    """
+    count_tokens = count_tokens or (lambda text: len(text.split()))
+    context_tokens = {table_id: count_tokens(context) for table_id, context in context_store.items()}
+
+    references = 0
+    inline_tokens = 0
+    referenced_tokens = 0
+    for chunk in chunks:
+        table_ids = [int(table_id) for table_id in CONTEXT_REFERENCE_PATTERN.findall(chunk)]
+        references += len(table_ids)
+        body_tokens = count_tokens(CONTEXT_REFERENCE_PATTERN.sub("", chunk))
+        referenced_tokens += body_tokens
+        inline_tokens += body_tokens + sum(context_tokens[table_id] for table_id in table_ids)
+
+    referenced_tokens += sum(context_tokens.values())
+    return {
+        "chunks": len(chunks),
+        "references": references,
+        "unique_contexts": len(context_store),
+        "tokens_inline": inline_tokens,
+        "tokens_deduplicated": referenced_tokens,
+        "tokens_saved": inline_tokens - referenced_tokens
+    }
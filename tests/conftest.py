@@ -0,0 +1,113 @@
+import os
+import sys
+
+import pytest
+
+# The modules under test live next to the scripts at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from script_helpers import VOCABULARY, load_handler
+from tests.stand_ins import StandInReranker, use_stand_ins
+
+def load_endpoint(model_name, small_model_name=None, env=None, stand_ins=None):
+    """
+    Load inference-script.py with the given model names and run model_fn
+
+    The environment is patched while the handler loads and model_fn runs,
+    which is when the handler reads it.
+
+    Args:
+        stand_ins (dict): Model name -> StandInReranker, served instead of loading the models
+
+    Returns:
+        tuple: (handler, model)
+    """
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setenv("MODEL_NAME", model_name)
+        if small_model_name:
+            patch.setenv("SMALL_MODEL_NAME", small_model_name)
+        else:
+            patch.delenv("SMALL_MODEL_NAME", raising=False)
+        patch.delenv("ADMISSION_MAX_COST", raising=False)
+        for name, value in (env or {}).items():
+            patch.setenv(name, value)
+        handler = load_handler()
+        if stand_ins:
+            use_stand_ins(handler, stand_ins)
+        return handler, handler.model_fn("/opt/ml/model")
+
+@pytest.fixture(scope="module")
+def stand_in_models():
+    """
+    Stand-in models by name: the first serves the base route, a second one the small route
+
+    Override in a test module to change the models behind the endpoint fixture.
+    """
+    return {"stand-in": StandInReranker("stand-in", ms_per_token=0.0, fixed_ms=0.0)}
+
+@pytest.fixture(scope="module")
+def handler_env():
+    """
+    Extra environment variables for the handler behind the endpoint fixture
+    """
+    return {}
+
+@pytest.fixture(scope="module")
+def endpoint(stand_in_models, handler_env):
+    """
+    Handler over the stand-in models, as (handler, model)
+    """
+    names = list(stand_in_models)
+    return load_endpoint(names[0], names[1] if len(names) > 1 else None, handler_env, stand_in_models)
+
+@pytest.fixture(scope="session")
+def tiny_model_dir(tmp_path_factory):
+    """
+    Randomly initialised two-layer Qwen2 reranker checkpoint, built offline
+
+    Scores are meaningless, but every scoring path runs the same network, so
+    they must agree with MxbaiRerankV2.predict.
+    """
+    import torch
+    from tokenizers import Tokenizer, decoders, models, pre_tokenizers, trainers
+    from transformers import PreTrainedTokenizerFast, Qwen2Config, Qwen2ForCausalLM
+
+    path = tmp_path_factory.mktemp("tiny-reranker")
+    tokenizer = Tokenizer(models.BPE(unk_token="<unk>"))
+    tokenizer.pre_tokenizer = pre_tokenizers.ByteLevel(add_prefix_space=False)
+    tokenizer.decoder = decoders.ByteLevel()
+    trainer = trainers.BpeTrainer(
+        vocab_size=400,
+        special_tokens=["<unk>", "<|endoftext|>", "<|im_start|>", "<|im_end|>"],
+        initial_alphabet=pre_tokenizers.ByteLevel.alphabet()
+    )
+    corpus = [" ".join(VOCABULARY), "<|im_start|>system\nquery: document: instruction: Relevance: 0 1<|im_end|>"]
+    tokenizer.train_from_iterator(corpus * 20, trainer)
+    PreTrainedTokenizerFast(
+        tokenizer_object=tokenizer,
+        unk_token="<unk>",
+        pad_token="<|endoftext|>",
+        eos_token="<|im_end|>",
+        additional_special_tokens=["<|im_start|>", "<|im_end|>"]
+    ).save_pretrained(path)
+
+    config = Qwen2Config(
+        vocab_size=tokenizer.get_vocab_size(),
+        hidden_size=64,
+        intermediate_size=128,
+        num_hidden_layers=2,
+        num_attention_heads=4,
+        num_key_value_heads=2,
+        max_position_embeddings=1024,
+        tie_word_embeddings=True
+    )
+    torch.manual_seed(0)
+    Qwen2ForCausalLM(config).save_pretrained(path)
+    return str(path)
+
+@pytest.fixture(scope="module")
+def tiny_endpoint(tiny_model_dir):
+    """
+    Handler over the tiny Qwen2 checkpoint, as (handler, model)
+    """
+    return load_endpoint(tiny_model_dir, env={"WARMUP_LENGTHS": "16"})
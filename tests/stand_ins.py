@@ -0,0 +1,94 @@
+import re
+import time
+
+from mxbai_rerank.base import RankResult
+
+from script_helpers import VOCABULARY
+
+def word_tokenizer(name="stand-in"):
+    """
+    Fast tokenizer with one token per word or punctuation mark, built without downloads
+    """
+    from tokenizers import Tokenizer, models, pre_tokenizers
+    from transformers import PreTrainedTokenizerFast
+
+    vocabulary = {"[UNK]": 0, "[PAD]": 1}
+    for word in VOCABULARY + ["query", "document", ":"]:
+        vocabulary.setdefault(word, len(vocabulary))
+    tokenizer = Tokenizer(models.WordLevel(vocabulary, unk_token="[UNK]"))
+    tokenizer.pre_tokenizer = pre_tokenizers.Whitespace()
+    return PreTrainedTokenizerFast(tokenizer_object=tokenizer, unk_token="[UNK]", pad_token="[PAD]", name_or_path=name)
+
+class StandInReranker:
+    """
+    Lightweight test double for MxbaiRerankV2 with a configurable speed
+
+    Provides what inference-script.py uses when VECTORIZED_SCORING is off: a
+    fast tokenizer, the prompt templates and their token overhead, and rank().
+    A document scores the share of query words it contains, and rank() sleeps
+    fixed_ms plus ms_per_token for every token it scores, so routing, admission
+    control and model swaps can be exercised offline with models of different
+    speeds.
+    """
+
+    query_prompt = "query: {query}"
+    doc_prompt = "document: {document}"
+
+    def __init__(self, name="stand-in", ms_per_token=0.01, fixed_ms=1.0, max_length=512):
+        """
+        Args:
+            name (str): Model name, also the tokenizer's name_or_path
+            ms_per_token (float): Simulated cost per scored token
+            fixed_ms (float): Simulated cost per rank() call
+            max_length (int): Tokens per pair beyond which documents count as truncated
+        """
+        self.name = name
+        self.ms_per_token = ms_per_token
+        self.fixed_ms = fixed_ms
+        self.max_length = max_length
+        self.tokenizer = word_tokenizer(name)
+        self.sep_inputs = [0]
+        self.predefined_length = 8
+        self.device = "cpu"
+        # Dropped by release_model, like the network of a real model
+        self.model = self
+        self.calls = 0
+        self.tokens = 0
+
+    def rank(self, query, documents, *, top_k=100, sort=True, return_documents=True, **kwargs):
+        """
+        Score documents against a query, taking the simulated time
+        """
+        if self.model is None:
+            raise RuntimeError(f"Stand-in model {self.name} was released")
+        query_words = set(re.findall(r"\w+", query.lower()))
+        document_ids = self.tokenizer(documents, add_special_tokens=False)["input_ids"]
+        overhead = self.predefined_length + len(self.tokenizer(query, add_special_tokens=False)["input_ids"])
+        tokens = sum(min(overhead + len(ids), self.max_length) for ids in document_ids)
+        time.sleep((self.fixed_ms + self.ms_per_token * tokens) / 1000)
+        self.calls += 1
+        self.tokens += tokens
+
+        results = []
+        for index, document in enumerate(documents):
+            words = set(re.findall(r"\w+", document.lower()))
+            score = len(query_words & words) / max(len(query_words), 1)
+            results.append(RankResult(index=index, score=score, document=document if return_documents else None))
+        if sort:
+            results.sort(key=lambda result: -result.score)
+        return results[:top_k]
+
+def use_stand_ins(handler, models):
+    """
+    Make a loaded inference-script.py build stand-ins instead of MxbaiRerankV2 models
+
+    model_fn (MODEL_NAME, SMALL_MODEL_NAME) and swap_model then look model
+    names up in models. Vectorized scoring needs the real network, so
+    scoring goes through rank().
+
+    Args:
+        handler: Module loaded with script_helpers.load_handler
+        models (dict): Model name -> StandInReranker
+    """
+    handler.MxbaiRerankV2 = lambda name, **kwargs: models[name]
+    handler.VECTORIZED_SCORING = False
@@ -0,0 +1,28 @@
+import numpy as np
+
+from ann_index import CorpusRetriever, IVFIndex, build_store_index, hashing_embed
+from chunk_store import ChunkStoreWriter
+from script_helpers import synthetic_documents
+
+def test_empty_store_builds_an_empty_index(tmp_path):
+    with ChunkStoreWriter(str(tmp_path)):
+        pass
+    index = build_store_index(str(tmp_path))
+    assert index.config["n_lists"] == 0
+
+    retriever = CorpusRetriever(str(tmp_path))
+    assert retriever.fetch("fixed deposit rate") == ([], [])
+
+def test_search_finds_an_indexed_chunk(tmp_path):
+    documents = synthetic_documents(300, 5, 40)
+    with ChunkStoreWriter(str(tmp_path)) as writer:
+        writer.extend(documents)
+    build_store_index(str(tmp_path), n_lists=8)
+
+    chunk_ids, texts = CorpusRetriever(str(tmp_path), n_probe=8).fetch(documents[42], candidates=5)
+    assert chunk_ids[0] == 42 and texts[0] == documents[42]
+
+def test_build_without_vectors():
+    index = IVFIndex.build(np.zeros((0, 16), dtype=np.float32))
+    chunk_ids, scores = index.search(hashing_embed(["fixed deposit"], dim=16)[0])
+    assert len(chunk_ids) == len(scores) == 0
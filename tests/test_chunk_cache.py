@@ -0,0 +1,71 @@
+import os
+
+from chonkie import RecursiveChunker
+from tokenizers import Tokenizer, models, pre_tokenizers
+
+from chunk_cache import ChunkCache, chunker_config_hash, processor_version
+from script_helpers import VOCABULARY, load_script, synthetic_documents
+
+def word_level_tokenizer(words):
+    tokenizer = Tokenizer(models.WordLevel({word: i for i, word in enumerate(["[UNK]"] + words)}, unk_token="[UNK]"))
+    tokenizer.pre_tokenizer = pre_tokenizers.Whitespace()
+    return tokenizer
+
+def test_config_hash_tracks_the_tokenizer():
+    first = RecursiveChunker(tokenizer_or_token_counter=word_level_tokenizer(["fixed", "deposit"]))
+    same = RecursiveChunker(tokenizer_or_token_counter=word_level_tokenizer(["fixed", "deposit"]))
+    other = RecursiveChunker(tokenizer_or_token_counter=word_level_tokenizer(["savings", "account"]))
+    assert chunker_config_hash(first) == chunker_config_hash(same)
+    assert chunker_config_hash(first) != chunker_config_hash(other)
+
+def test_table_processor_has_explicit_version():
+    processor = load_script("fully-fixed-table-processor.py").process_chunks
+    assert processor_version(processor) == processor.__version__
+
+def test_get_returns_what_put_stored(tmp_path):
+    cache = ChunkCache(str(tmp_path))
+    key = ChunkCache.key("document", "config", "1")
+    assert cache.get(key) is None
+
+    chunks = [{"text": "Rates are revised every quarter.", "section_path": ["Fixed Deposits", "Rates"]}, "plain chunk"]
+    cache.put(key, chunks)
+    assert cache.get(key) == chunks
+    # Another process (here: a new instance) reads the same entry
+    assert ChunkCache(str(tmp_path)).get(key) == chunks
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+def test_eviction_follows_recency_across_restarts(tmp_path):
+    cache = ChunkCache(str(tmp_path))
+    keys = [ChunkCache.key(name, "config", "1") for name in "abcd"]
+    for age, key in zip((30, 20, 10), keys):
+        cache.put(key, ["x" * 100])
+        mtime = os.path.getmtime(cache._entry_path(key)) - age
+        os.utime(cache._entry_path(key), (mtime, mtime))
+    entry_bytes = cache.total_bytes // 3
+
+    # After a restart, recency comes from modification times: a, then b, then c
+    restarted = ChunkCache(str(tmp_path), max_bytes=3 * entry_bytes)
+    assert restarted.get(keys[0]) is not None
+    restarted.put(keys[3], ["x" * 100])
+    assert restarted.evictions == 1
+    assert [restarted.get(key) is not None for key in keys] == [True, False, True, True]
+
+def test_processor_version_change_invalidates_entries(tmp_path):
+    cache = ChunkCache(str(tmp_path))
+    chunker = RecursiveChunker(tokenizer_or_token_counter=word_level_tokenizer(VOCABULARY), chunk_size=32)
+    document = synthetic_documents(1, 200, 200)[0]
+    calls = []
+
+    def post_processor(chunks):
+        calls.append(post_processor.__version__)
+        return [chunk.upper() for chunk in chunks]
+
+    post_processor.__version__ = "1"
+    first = cache.chunk(document, chunker, post_processor)
+    assert cache.chunk(document, chunker, post_processor) == first
+    assert calls == ["1"]
+
+    post_processor.__version__ = "2"
+    assert cache.chunk(document, chunker, post_processor) == first
+    assert calls == ["1", "2"]
+    assert cache.stats()["entries"] == 2
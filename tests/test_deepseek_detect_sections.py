@@ -0,0 +1,74 @@
+import random
+
+import pytest
+
+from deepseek_detect_sections import (
+    chunk1,
+    chunk2,
+    chunk3,
+    process_all_chunks,
+    process_sections,
+    process_tables,
+)
+
+LINES = [
+    "# Fixed Deposits", "## Rates", "### Senior Citizens", "#### Tenure ####", "###### Notes",
+    "- Monthly payout", "* Quarterly payout", "+ Cumulative", "1. Open an account", "  - Nested item",
+    "| Tenure | Rate |", "|7-14 days |3.00% |", "| 400 days | 7.90% |", "| --- | --- |", "|---|---|",
+    "Rates are revised every quarter.", "IDFC FIRST Bank offers the best FD rates:", "   padded text   ",
+    "#hashtag, not a heading", "-not a list item", "",
+]
+
+CASES = {
+    "table rows continue": (
+        ["Rates for deposits:\n| Tenure | Rate |\n| --- | --- |\n| 7 days | 3.00% |",
+         "| 400 days | 7.90% |\nRates are revised every quarter."],
+        [{"text": "Rates for deposits:\n| Tenure | Rate |\n| --- | --- |\n| 7 days | 3.00% |", "section_path": []},
+         {"text": "Rates for deposits:\n| Tenure | Rate |\n| --- | --- |\n| 400 days | 7.90% |\nRates are revised every quarter.",
+          "section_path": []}]
+    ),
+    "list items continue": (
+        ["## Benefits\nThe scheme offers:\n- Flexible tenure", "- Tax savings\n- Senior citizen perks"],
+        [{"text": "## Benefits\nThe scheme offers:\n- Flexible tenure", "section_path": ["Benefits"]},
+         {"text": "## Benefits\nThe scheme offers:\n- Tax savings\n- Senior citizen perks", "section_path": ["Benefits"]}]
+    ),
+    "headings nest and close": (
+        ["# Fixed Deposits\n## Rates\nRates are revised every quarter.", "### Senior Citizens\nAn extra 0.50%.",
+         "## Eligibility\nResidents and NRIs."],
+        [{"text": "# Fixed Deposits\n## Rates\nRates are revised every quarter.", "section_path": ["Fixed Deposits", "Rates"]},
+         {"text": "Fixed Deposits > Rates\n### Senior Citizens\nAn extra 0.50%.",
+          "section_path": ["Fixed Deposits", "Rates", "Senior Citizens"]},
+         {"text": "Fixed Deposits\n## Eligibility\nResidents and NRIs.", "section_path": ["Fixed Deposits", "Eligibility"]}]
+    ),
+}
+
+def two_pass(chunks, breadcrumbs=False, return_metadata=False):
+    """
+    Tables first, then sections: what process_all_chunks does in one pass
+    """
+    return process_sections(process_tables(chunks), breadcrumbs=breadcrumbs, return_metadata=return_metadata)
+
+@pytest.mark.parametrize("chunks, expected", CASES.values(), ids=CASES.keys())
+def test_context_is_carried_across_chunks(chunks, expected):
+    assert process_all_chunks(chunks, breadcrumbs=True, return_metadata=True) == expected
+    assert two_pass(chunks, breadcrumbs=True, return_metadata=True) == expected
+
+def test_code_fences_hide_markdown():
+    chunks = ["```python\n# not a heading\n- not a list", "| not | a table |\n```\n- Monthly payout"]
+    assert process_all_chunks(chunks, breadcrumbs=True, return_metadata=True) == [
+        {"text": "```python\n# not a heading\n- not a list", "section_path": []},
+        {"text": "```python\n| not | a table |\n```\n- Monthly payout", "in_code_block": True, "section_path": []}
+    ]
+
+def test_example_chunks_match_two_pass_pipeline():
+    chunks = [chunk1, chunk2, chunk3]
+    assert process_all_chunks(chunks, breadcrumbs=True, return_metadata=True) == two_pass(chunks, True, True)
+
+@pytest.mark.parametrize("breadcrumbs", [False, True])
+@pytest.mark.parametrize("return_metadata", [False, True])
+def test_sampled_chunks_match_two_pass_pipeline(breadcrumbs, return_metadata):
+    # Code fences are left out: the fused pipeline handles them, the two-pass one does not
+    rng = random.Random(0)
+    for _ in range(100):
+        chunks = ["\n".join(rng.choice(LINES) for _ in range(rng.randint(0, 10))) for _ in range(rng.randint(1, 6))]
+        assert process_all_chunks(chunks, breadcrumbs, return_metadata) == two_pass(chunks, breadcrumbs, return_metadata), chunks
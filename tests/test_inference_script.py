@@ -0,0 +1,63 @@
+import json
+import threading
+
+import pytest
+
+from script_helpers import synthetic_documents
+
+@pytest.mark.parametrize("options", [
+    {"mode": "truncate"},
+    {"mode": "adaptive", "cheap_tokens": 16},
+    {"mode": "windowed", "window_tokens": 32, "aggregation": "max"},
+    {"mode": "windowed", "window_tokens": 32, "aggregation": "mean"},
+    {"mode": "windowed", "window_tokens": 32, "aggregation": "top2"},
+])
+def test_relative_gap_response_serializes(endpoint, options):
+    handler, model = endpoint
+    request = dict(options, query="fixed deposit interest rate", documents=synthetic_documents(12, 5, 120), top_k=5, relative_gap=0.5)
+    response = json.loads(handler.output_fn(handler.predict_fn(request, model), "application/json"))
+
+    threshold = response["stats"]["score_threshold"]
+    scores = [result["score"] for result in response["results"]]
+    assert scores and all(score >= threshold for score in scores)
+    assert threshold == pytest.approx(scores[0] - 0.5)
+
+@pytest.mark.parametrize("options, message", [
+    ({"window_tokens": 0}, "window_tokens must be at least 1"),
+    ({"window_tokens": 32, "window_overlap": 32}, "window_overlap must be at least 0 and below window_tokens"),
+    ({"window_tokens": 32, "window_overlap": -1}, "window_overlap must be at least 0 and below window_tokens"),
+])
+def test_invalid_windows_are_rejected(endpoint, options, message):
+    handler, model = endpoint
+    request = dict(options, mode="windowed", query="fixed deposit rate", documents=synthetic_documents(3, 5, 80))
+    assert message in handler.predict_fn(request, model)["error"]
+
+@pytest.mark.parametrize("cheap_tokens", [0, -8])
+def test_adaptive_mode_needs_a_cheap_prefix(endpoint, cheap_tokens):
+    handler, model = endpoint
+    request = {"mode": "adaptive", "cheap_tokens": cheap_tokens, "query": "fixed deposit rate", "documents": synthetic_documents(3, 5, 80)}
+    assert handler.predict_fn(request, model)["error"] == f"cheap_tokens must be at least 1, got {cheap_tokens}"
+
+def test_null_top_k_uses_the_default(endpoint):
+    handler, model = endpoint
+    request = {"query": "fixed deposit rate", "documents": synthetic_documents(6, 5, 40), "top_k": None, "max_k": None}
+    assert len(handler.predict_fn(request, model)["results"]) == 3
+    assert "top_k must be an integer" in handler.predict_fn(dict(request, top_k="5"), model)["error"]
+
+def test_admission_counters_under_concurrency(endpoint, monkeypatch):
+    handler, model = endpoint
+    admission = handler.AdmissionController(10 ** 9)
+    monkeypatch.setattr(handler, "ADMISSION_MAX_COST", admission.max_cost)
+    monkeypatch.setattr(handler, "admission", admission)
+    request = {"query": "fixed deposit rate", "documents": synthetic_documents(2, 5, 20), "top_k": 1}
+
+    def send():
+        for _ in range(50):
+            handler.predict_fn(dict(request), model)
+
+    senders = [threading.Thread(target=send) for _ in range(8)]
+    for sender in senders:
+        sender.start()
+    for sender in senders:
+        sender.join()
+    assert admission.snapshot() == {"admitted": 400, "degraded": 0, "rejected": 0, "in_flight_cost": 0, "in_flight_pairs": 0}
@@ -0,0 +1,42 @@
+import pytest
+
+from tests.stand_ins import StandInReranker
+
+@pytest.fixture(scope="module")
+def stand_in_models():
+    """
+    A slow base and a fast small stand-in model
+    """
+    return {
+        "stand-in-base": StandInReranker("stand-in-base", ms_per_token=0.05),
+        "stand-in-small": StandInReranker("stand-in-small", ms_per_token=0.005)
+    }
+
+def rerank_request(**options):
+    documents = ["fixed deposit interest rate for senior citizens " * 10, "savings account", "loan amount"]
+    return dict({"query": "fixed deposit rate", "documents": documents, "top_k": 2}, **options)
+
+def test_calibration_measures_both_speeds(endpoint):
+    handler, _ = endpoint
+    assert handler.routes["small"].ms_per_token < handler.routes["base"].ms_per_token
+
+def test_requests_within_budget_stay_on_base(endpoint):
+    handler, model = endpoint
+    prediction = handler.predict_fn(rerank_request(latency_budget_ms=10_000), model)
+    assert prediction["stats"]["route"]["name"] == "base"
+    assert prediction["results"][0]["index"] == 0
+
+def test_tight_budget_falls_back_to_small(endpoint):
+    handler, model = endpoint
+    prediction = handler.predict_fn(rerank_request(latency_budget_ms=0.001), model)
+    assert prediction["stats"]["route"]["name"] == "small"
+
+def test_queue_depth_falls_back_to_small(endpoint, monkeypatch):
+    handler, model = endpoint
+    monkeypatch.setattr(handler.routes["base"], "queue_depth", handler.ROUTE_MAX_QUEUE)
+    assert handler.predict_fn(rerank_request(), model)["stats"]["route"]["name"] == "small"
+
+def test_explicit_route_wins(endpoint):
+    handler, model = endpoint
+    assert handler.predict_fn(rerank_request(route="small", latency_budget_ms=10_000), model)["stats"]["route"]["name"] == "small"
+    assert "error" in handler.predict_fn(rerank_request(route="missing"), model)
@@ -0,0 +1,58 @@
+import threading
+
+import pytest
+
+from script_helpers import synthetic_documents
+from tests.stand_ins import StandInReranker
+
+@pytest.fixture(scope="module")
+def stand_in_models():
+    return {"stand-in-v1": StandInReranker("stand-in-v1", ms_per_token=0.01)}
+
+@pytest.fixture(scope="module")
+def handler_env():
+    return {"ALLOW_MODEL_SWAP": "1", "WARMUP_LENGTHS": "16"}
+
+def test_swap_under_traffic_never_serves_a_released_model(endpoint, stand_in_models):
+    handler, model = endpoint
+    old = stand_in_models["stand-in-v1"]
+    # The handler looks names up in this dict, so swap_model can now load the new version
+    new = stand_in_models["stand-in-v2"] = StandInReranker("stand-in-v2", ms_per_token=0.01)
+    request = {"query": "fixed deposit rate", "documents": synthetic_documents(8, 5, 40), "top_k": 3}
+    errors = []
+    statuses = []
+    stop = threading.Event()
+
+    def traffic():
+        while not stop.is_set():
+            try:
+                prediction = handler.predict_fn(dict(request), model)
+                if "error" in prediction:
+                    errors.append(prediction["error"])
+            except Exception as error:
+                errors.append(repr(error))
+
+    def poll_metrics():
+        while not stop.is_set():
+            statuses.append(handler.predict_fn({"metrics": True}, model)["swap"])
+
+    senders = [threading.Thread(target=traffic) for _ in range(4)] + [threading.Thread(target=poll_metrics)]
+    for sender in senders:
+        sender.start()
+    try:
+        status = handler.swap_model("stand-in-v2", wait=True)
+    finally:
+        stop.set()
+        for sender in senders:
+            sender.join()
+
+    assert status["state"] == "swapped", status
+    assert errors == []
+    # Every status seen has the timings of the phases it has completed
+    completed = {"warming": ["load_ms"], "draining": ["load_ms", "warmup_ms"], "swapped": ["load_ms", "warmup_ms", "drain_ms"]}
+    for seen in statuses + [status]:
+        assert all(key in seen for key in completed.get(seen["state"], [])), seen
+    assert old.model is None and old.calls > 0
+    calls = new.calls
+    assert "results" in handler.predict_fn(dict(request), model)
+    assert new.calls == calls + 1
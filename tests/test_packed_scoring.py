@@ -0,0 +1,89 @@
+import threading
+
+import numpy as np
+import pytest
+
+from script_helpers import random_text, synthetic_documents
+
+QUERY = "fixed deposit interest rate for senior citizens"
+
+def predicted_scores(model, documents, query=QUERY):
+    return model.predict([query] * len(documents), documents).numpy()
+
+def test_score_pairs_matches_predict(tiny_endpoint):
+    handler, model = tiny_endpoint
+    # Lengths vary within each batch, so pairs carry different amounts of left padding
+    documents = synthetic_documents(20, 1, 150, seed=3)
+    scores = handler.score_pairs(model, QUERY, documents, batch_size=8)
+    np.testing.assert_allclose(scores, predicted_scores(model, documents), atol=1e-5)
+
+@pytest.mark.parametrize("query_words, batch_size", [(3, 8), (40, 8), (8, 1), (8, 64)])
+def test_prefix_cache_matches_full_scoring(tiny_endpoint, query_words, batch_size):
+    handler, model = tiny_endpoint
+    query = random_text(query_words, seed=query_words)
+    # One-word to long documents in the same batch: continuations are right-padded
+    # behind the shared prefix cache, which is broadcast over the batch
+    documents = synthetic_documents(24, 1, 200, seed=5) + ["rate", ""]
+    cached = handler.score_pairs_with_prefix_cache(model, query, documents, batch_size=batch_size)
+    np.testing.assert_allclose(cached, handler.score_pairs(model, query, documents, batch_size=batch_size), atol=1e-5)
+    np.testing.assert_allclose(cached, predicted_scores(model, documents, query), atol=1e-5)
+
+def test_vectorized_rerank_matches_predict(tiny_endpoint):
+    handler, model = tiny_endpoint
+    assert handler.VECTORIZED_SCORING
+    documents = synthetic_documents(12, 5, 60, seed=4)
+    prediction = handler.predict_fn({"query": QUERY, "documents": documents, "top_k": 12, "deduplicate": False}, model)
+    expected = predicted_scores(model, documents)
+    assert [result["index"] for result in prediction["results"]] == list(np.argsort(-expected, kind="stable"))
+    np.testing.assert_allclose([result["score"] for result in prediction["results"]], np.sort(expected)[::-1], atol=1e-5)
+
+@pytest.mark.parametrize("prefix_cache", [True, False])
+def test_pipelined_scores_match_score_pairs(tiny_endpoint, monkeypatch, prefix_cache):
+    handler, model = tiny_endpoint
+    monkeypatch.setattr(handler, "PREFIX_CACHE_SCORING", prefix_cache)
+    # Shuffled lengths, so batches are scored out of order and must be put back by index
+    documents = synthetic_documents(30, 1, 120, seed=6)
+    timings = {}
+    pipelined = handler.score_pairs_pipelined(model, QUERY, documents, batch_size=4, queue_size=1, timings=timings)
+    np.testing.assert_allclose(pipelined, handler.score_pairs(model, QUERY, documents), atol=1e-5)
+    assert timings["wall_ms"] > 0
+
+    # One pair per batch packs the same tensors on both paths
+    one_by_one = handler.score_pairs_pipelined(model, QUERY, documents[:6], batch_size=1)
+    if prefix_cache:
+        expected = handler.score_pairs_with_prefix_cache(model, QUERY, documents[:6], batch_size=1)
+    else:
+        expected = handler.score_pairs(model, QUERY, documents[:6], batch_size=1)
+    np.testing.assert_array_equal(one_by_one, expected)
+
+def fail_on_call(function, call):
+    """
+    Wrap function to raise RuntimeError on its call-th call
+    """
+    calls = []
+
+    def wrapper(*args, **kwargs):
+        calls.append(None)
+        if len(calls) == call:
+            raise RuntimeError("stage failed")
+        return function(*args, **kwargs)
+    return wrapper
+
+@pytest.mark.parametrize("stage, prefix_cache", [
+    ("encode_pairs", True),
+    ("score_continuations", True),
+    ("forward", False),
+])
+def test_pipelined_stage_errors_propagate(tiny_endpoint, monkeypatch, stage, prefix_cache):
+    handler, model = tiny_endpoint
+    monkeypatch.setattr(handler, "PREFIX_CACHE_SCORING", prefix_cache)
+    if stage == "forward":
+        monkeypatch.setattr(model, "forward", fail_on_call(model.forward, 2))
+    else:
+        monkeypatch.setattr(handler, stage, fail_on_call(getattr(handler, stage), 2))
+    threads = threading.active_count()
+
+    with pytest.raises(RuntimeError, match="stage failed"):
+        handler.score_pairs_pipelined(model, QUERY, synthetic_documents(40, 1, 60, seed=7), batch_size=2, queue_size=1)
+    # Both helper threads have stopped, none is left blocked on a full queue
+    assert threading.active_count() == threads
@@ -0,0 +1,46 @@
+import random
+
+import pytest
+
+from scatter_gather_rerank import local_invoke, scatter_gather_rerank, shard_documents
+from script_helpers import VOCABULARY
+
+QUERY = "fixed deposit interest rate for senior citizens"
+
+def documents(count, seed=0):
+    rng = random.Random(seed)
+    return [" ".join(rng.choices(VOCABULARY, k=rng.randint(3, 30))) for _ in range(count)]
+
+def single_request(endpoint, docs, **options):
+    handler, model = endpoint
+    request = dict(options, query=QUERY, documents=docs, return_documents=False, deduplicate=False)
+    return [(result["index"], result["score"]) for result in handler.predict_fn(request, model)["results"]]
+
+def scattered(endpoint, docs, **options):
+    invoke = local_invoke({"local": endpoint})
+    results = scatter_gather_rerank(QUERY, docs, "local", invoke=invoke, return_documents=False, deduplicate=False, **options)
+    return [(result["index"], result["score"]) for result in results]
+
+def test_matches_a_single_request(endpoint):
+    docs = documents(40)
+    assert scattered(endpoint, docs, top_k=5, num_shards=4) == single_request(endpoint, docs, top_k=5)
+
+def test_cutoffs_can_leave_fewer_than_top_k(endpoint):
+    docs = documents(40, seed=1)
+    results = scattered(endpoint, docs, top_k=20, num_shards=4, min_score=0.5)
+    assert len(results) < 20
+    assert results == single_request(endpoint, docs, top_k=20, min_score=0.5)
+
+def test_relative_gap_is_measured_from_the_global_best(endpoint):
+    # The second shard's best document is far below the first shard's
+    docs = ["fixed deposit interest rate for senior citizens", "fixed deposit rate"] + ["savings account"] * 2
+    results = scattered(endpoint, docs, top_k=4, num_shards=2, relative_gap=0.3)
+    assert results == single_request(endpoint, docs, top_k=4, relative_gap=0.3)
+    assert [index for index, _ in results] == [0]
+
+def test_shards_respect_the_payload_limit():
+    docs = documents(200, seed=2)
+    shards = shard_documents(docs, 3, max_payload_bytes=1000)
+    assert [doc for _, shard in shards for doc in shard] == docs
+    assert all(offset == sum(len(shard) for _, shard in shards[:i]) for i, (offset, _) in enumerate(shards))
+    assert all(len(shard) == 1 or sum(len(doc) + 2 for doc in shard) <= 1000 for _, shard in shards)
@@ -0,0 +1,29 @@
+from chunk_store import ChunkStore, ChunkStoreWriter
+from script_helpers import load_script
+from table_context_refs import materialize_chunks, materialize_table_context, referenced_table_id, table_id_for
+
+CHUNKS = [
+    "Fixed deposit rates\n\n| Tenure | Rate |\n| --- | --- |\n| 7 days | 3.00% |",
+    "| 400 days | 7.90% |\n| 725 days | 7.25% |",
+    "Rates are revised every quarter.",
+]
+
+def test_table_ids_fit_the_store_column():
+    table_id = table_id_for("| Tenure | Rate |\n| --- | --- |")
+    assert isinstance(table_id, int) and 0 <= table_id < 2 ** 63
+    assert table_id == table_id_for("| Tenure | Rate |\n| --- | --- |")
+
+def test_referenced_chunks_round_trip_through_the_store(tmp_path):
+    process_chunks = load_script("fully-fixed-table-processor.py").process_chunks
+    context_store = {}
+    referenced = process_chunks(CHUNKS, context_store)
+    assert materialize_chunks(referenced, context_store) == process_chunks(CHUNKS)
+
+    with ChunkStoreWriter(str(tmp_path)) as writer:
+        chunk_ids = writer.extend({"text": chunk, "table_id": referenced_table_id(chunk)} for chunk in referenced)
+
+    with ChunkStore(str(tmp_path)) as store:
+        table_ids = [store.metadata(chunk_id)["table_id"] for chunk_id in chunk_ids]
+        assert table_ids[1] in context_store
+        assert table_ids[0] == table_ids[2] == -1
+        assert [materialize_table_context(store[chunk_id], context_store) for chunk_id in chunk_ids] == process_chunks(CHUNKS)
@@ -0,0 +1,32 @@
+from chonkie import RecursiveChunker
+
+from script_helpers import synthetic_documents
+from tests.stand_ins import word_tokenizer
+from token_count_cache import TokenCountCache, tokenizer_name
+
+DOCUMENTS = synthetic_documents(5, 100, 300, seed=8)
+
+def cached_chunker(path):
+    chunker = RecursiveChunker(tokenizer_or_token_counter=word_tokenizer(), chunk_size=64)
+    cache = TokenCountCache(tokenizer_name(chunker.tokenizer), path=str(path))
+    return cache.attach(chunker), cache
+
+def test_repeated_splits_are_counted_by_the_cache(tmp_path):
+    chunker, cache = cached_chunker(tmp_path / "counts.json")
+    for document in DOCUMENTS:
+        chunker.chunk(document)
+    misses = cache.misses
+
+    chunks = [chunk.text for document in DOCUMENTS for chunk in chunker.chunk(document)]
+    assert cache.misses == misses and cache.hits >= len(chunks)
+
+def test_persisted_counts_serve_a_fresh_chunker(tmp_path):
+    path = tmp_path / "counts.json"
+    chunker, cache = cached_chunker(path)
+    expected = [[chunk.token_count for chunk in chunker.chunk(document)] for document in DOCUMENTS]
+    cache.save()
+
+    fresh, fresh_cache = cached_chunker(path)
+    assert len(fresh_cache.counts) == len(cache.counts)
+    assert [[chunk.token_count for chunk in fresh.chunk(document)] for document in DOCUMENTS] == expected
+    assert fresh_cache.misses == 0 and fresh_cache.hits > 0
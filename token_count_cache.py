@@ -0,0 +1,171 @@
+import hashlib
+import json
+import os
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+def tokenizer_name(tokenizer: Any) -> str:
+    """
+    Stable identity of a tokenizer, for keying token counts and chunk caches.
+
+    Unwraps chonkie's Tokenizer wrapper. Tokenizers that can serialize their
+    vocabulary and rules (HF tokenizers, fast transformers tokenizers) are
+    identified by a digest of that serialization, since HF tokenizers carry no
+    name; others by their model name or path (slow transformers tokenizers,
+    tiktoken encodings) or, for character/word tokenizers and counting
+    functions, by their qualified name.
+    """
+    tokenizer = getattr(tokenizer, "tokenizer", tokenizer)
+    backend = getattr(tokenizer, "backend_tokenizer", tokenizer)
+    if hasattr(backend, "to_str"):
+        return "sha:" + hashlib.blake2b(backend.to_str().encode("utf-8"), digest_size=16).hexdigest()
+    name = getattr(tokenizer, "name_or_path", None) or getattr(tokenizer, "name", None)
+    if name:
+        return str(name)
+    return getattr(tokenizer, "__qualname__", None) or type(tokenizer).__qualname__
+
+class TokenCountCache:
+    """
+    Content-hash -> token-count memo for chunkers.
+
+    Bank documents repeat the same disclaimers, table headers and footers on every
+    page, and RecursiveChunker re-counts tokens for each of those splits on every
+    call. The cache sits in front of the chunker's tokenizer, is shared by every
+    document chunked in the process and can be persisted to disk between runs.
+
+    Counts are only valid for the tokenizer they were computed with, so each cache
+    carries a tokenizer name and ignores persisted counts made with another one.
+    """
+
+    def __init__(self, tokenizer_name: str = "gpt2", path: Optional[str] = None):
+        """
+        Args:
+            tokenizer_name: Name of the tokenizer the counts belong to
+            path: Optional JSON file to load counts from and save them to
+        """
+        self.tokenizer_name = tokenizer_name
+        self.path = path
+        self.counts: Dict[str, int] = {}
+        self.hits = 0
+        self.misses = 0
+
+        if path and os.path.exists(path):
+            self.load(path)
+
+    @staticmethod
+    def key(text: str) -> str:
+        """
+        Content hash used as the cache key.
+        """
+        return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+    def wrap(self, count_tokens: Callable[[str], int]) -> Callable[[str], int]:
+        """
+        Memoize a single-text token counter.
+        """
+        def cached_count_tokens(text: str) -> int:
+            key = self.key(text)
+            count = self.counts.get(key)
+            if count is None:
+                self.misses += 1
+                count = count_tokens(text)
+                self.counts[key] = count
+            else:
+                self.hits += 1
+            return count
+
+        return cached_count_tokens
+
+    def wrap_batch(self, count_tokens_batch: Callable[[List[str]], List[int]]) -> Callable[[List[str]], List[int]]:
+        """
+        Memoize a batch token counter, only sending the misses to the tokenizer.
+        """
+        def cached_count_tokens_batch(texts: List[str]) -> List[int]:
+            keys = [self.key(text) for text in texts]
+            missing = [i for i, key in enumerate(keys) if key not in self.counts]
+            if missing:
+                new_counts = count_tokens_batch([texts[i] for i in missing])
+                for i, count in zip(missing, new_counts):
+                    self.counts[keys[i]] = count
+            self.misses += len(missing)
+            self.hits += len(texts) - len(missing)
+            return [self.counts[key] for key in keys]
+
+        return cached_count_tokens_batch
+
+    def attach(self, chunker):
+        """
+        Route a chonkie chunker's token counting through the cache.
+
+        Only counting is cached; encoding and decoding still go to the wrapped tokenizer.
+
+        Args:
+            chunker: A chonkie chunker such as RecursiveChunker
+
+        Returns:
+            The same chunker
+        """
+        tokenizer = chunker.tokenizer
+        tokenizer.count_tokens = self.wrap(tokenizer.count_tokens)
+        if hasattr(tokenizer, "count_tokens_batch"):
+            tokenizer.count_tokens_batch = self.wrap_batch(tokenizer.count_tokens_batch)
+        # RecursiveChunker memoizes its per-split counts in a class-level
+        # lru_cache, which would answer repeats before they reach this cache.
+        # Count through the cache directly, unless another hook (such as
+        # TokenEstimator.attach) has already replaced the method.
+        estimate = getattr(type(chunker), "_estimate_token_count", None)
+        if hasattr(estimate, "cache_info") and "_estimate_token_count" not in vars(chunker):
+            chunker._estimate_token_count = tokenizer.count_tokens
+        return chunker
+
+    def warm(self, chunker, texts: Iterable[str]) -> int:
+        """
+        Pre-populate the cache by chunking a sample corpus.
+
+        Chunking the samples counts exactly the splits later documents will share.
+
+        Args:
+            chunker: Chunker already attached to this cache
+            texts: Sample documents
+
+        Returns:
+            Number of new entries added to the cache
+        """
+        before = len(self.counts)
+        for text in texts:
+            chunker.chunk(text)
+        return len(self.counts) - before
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Hit/miss counters for the current process.
+        """
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.counts),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
+
+    def load(self, path: Optional[str] = None) -> int:
+        """
+        Merge counts persisted by save(); returns the number of entries loaded.
+        """
+        with open(path or self.path) as f:
+            data = json.load(f)
+        if data.get("tokenizer") != self.tokenizer_name:
+            return 0
+        self.counts.update(data["counts"])
+        return len(data["counts"])
+
+    def save(self, path: Optional[str] = None):
+        """
+        Persist the counts, replacing the file atomically.
+        """
+        path = path or self.path
+        if not path:
+            raise ValueError("No path given to save the token count cache to")
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"tokenizer": self.tokenizer_name, "counts": self.counts}, f)
+        os.replace(tmp_path, path)
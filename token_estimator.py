@@ -0,0 +1,195 @@
+import json
+import os
+import random
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+class TokenEstimator:
+    """
+    Calibrated chars-per-token estimate of token counts, exact only near the limit.
+
+    RecursiveChunker counts the tokens of every candidate split at every level,
+    although most splits are either far above chunk_size (they get split
+    further) or far below it (they get merged). The estimator predicts counts
+    from character lengths with a per-corpus chars-per-token ratio and the
+    spread of that ratio measured on chunk-sized spans, and only sends a span to
+    the tokenizer when the limit falls inside its predicted range.
+
+    Spans predicted to fit are counted at the upper end of their range, so
+    merged chunks stay within chunk_size (up to the calibration quantile) and
+    come out slightly smaller than with exact counts.
+    """
+
+    def __init__(
+        self,
+        count_tokens_batch: Callable[[List[str]], Sequence[int]],
+        chars_per_token: float = 4.0,
+        lower_ratio: float = 0.75,
+        upper_ratio: float = 1.25
+    ):
+        """
+        Args:
+            count_tokens_batch: Exact batch token counter
+            chars_per_token: Characters per token of the corpus
+            lower_ratio: Smallest expected ratio of exact to estimated count
+            upper_ratio: Largest expected ratio of exact to estimated count
+        """
+        self.count_tokens_batch = count_tokens_batch
+        self.chars_per_token = chars_per_token
+        self.lower_ratio = lower_ratio
+        self.upper_ratio = upper_ratio
+        self.estimated = 0
+        self.exact = 0
+
+    def calibrate(
+        self,
+        texts: Iterable[str],
+        span_tokens: int = 384,
+        samples: int = 2000,
+        quantile: float = 0.999,
+        seed: int = 0
+    ) -> Dict[str, float]:
+        """
+        Fit chars_per_token and the ratio range on random spans of a sample corpus.
+
+        Args:
+            texts: Sample documents of the corpus
+            span_tokens: Approximate span size in tokens (use the chunk size)
+            samples: Number of spans to count exactly
+            quantile: Share of spans whose count must fall inside the range
+            seed: Random seed
+
+        Returns:
+            dict: The fitted parameters and the number of spans used
+        """
+        texts = [text for text in texts if text]
+        if not texts:
+            raise ValueError("No text to calibrate the token estimator on")
+        rng = random.Random(seed)
+        weights = [len(text) for text in texts]
+        span_chars = max(1, int(span_tokens * self.chars_per_token))
+
+        spans = []
+        for text in rng.choices(texts, weights=weights, k=samples):
+            length = rng.randint(max(1, span_chars // 4), 2 * span_chars)
+            start = rng.randint(0, max(0, len(text) - length))
+            spans.append(text[start:start + length])
+
+        chars = np.fromiter(map(len, spans), dtype=np.float64, count=len(spans))
+        tokens = np.asarray(self.count_tokens_batch(spans), dtype=np.float64)
+        self.chars_per_token = float(chars.sum() / max(tokens.sum(), 1.0))
+
+        ratios = tokens / np.maximum(chars / self.chars_per_token, 1e-9)
+        self.lower_ratio = float(np.quantile(ratios, 1.0 - quantile))
+        self.upper_ratio = float(np.quantile(ratios, quantile))
+        return dict(self.calibration(), spans=len(spans))
+
+    def calibration(self) -> Dict[str, float]:
+        return {
+            "chars_per_token": self.chars_per_token,
+            "lower_ratio": self.lower_ratio,
+            "upper_ratio": self.upper_ratio
+        }
+
+    def count_batch(self, texts: Sequence[str], limit: int) -> np.ndarray:
+        """
+        Token counts of texts, exact only where the limit is within the predicted range.
+
+        Args:
+            texts: Candidate spans
+            limit: Token limit the counts are compared with (chunk_size)
+
+        Returns:
+            Counts: the upper estimate for spans that fit, the central estimate
+            for spans over the limit, and the exact count for the rest
+        """
+        lengths = np.fromiter(map(len, texts), dtype=np.float64, count=len(texts))
+        estimates = lengths / self.chars_per_token
+        upper = np.ceil(estimates * self.upper_ratio)
+        counts = np.where(upper <= limit, upper, np.ceil(estimates)).astype(np.int64)
+
+        near_limit = np.flatnonzero((upper > limit) & (estimates * self.lower_ratio <= limit))
+        if len(near_limit):
+            counts[near_limit] = self.count_tokens_batch([texts[i] for i in near_limit])
+        self.exact += len(near_limit)
+        self.estimated += len(texts) - len(near_limit)
+        return counts
+
+    def attach(self, chunker):
+        """
+        Size a chonkie RecursiveChunker's splits with estimates.
+
+        Each list of candidate splits is estimated in one vectorized call when it
+        is produced, and the chunker's per-split counting reads those counts.
+        Texts it counts outside of a split list are counted exactly. The
+        calibration is also set as a chunker attribute, so chunk caches keyed
+        on the chunker config (chunk_cache.chunker_config_hash) tell
+        approximate and exact output apart.
+
+        Args:
+            chunker: A chonkie RecursiveChunker (relies on its _split_text and
+                _estimate_token_count hooks)
+
+        Returns:
+            The same chunker
+        """
+        split_text = chunker._split_text
+        chunk = chunker.chunk
+        tokenizer = chunker.tokenizer
+        counts: Dict[str, int] = {}
+
+        def estimated_split_text(text, recursive_level):
+            splits = split_text(text, recursive_level)
+            counts.update(zip(splits, self.count_batch(splits, chunker.chunk_size).tolist()))
+            return splits
+
+        def estimated_token_count(text):
+            count = counts.get(text)
+            if count is None:
+                self.exact += 1
+                count = tokenizer.count_tokens(text)
+            return count
+
+        def estimated_chunk(text):
+            counts.clear()
+            try:
+                return chunk(text)
+            finally:
+                counts.clear()
+
+        chunker._split_text = estimated_split_text
+        chunker._estimate_token_count = estimated_token_count
+        chunker.chunk = estimated_chunk
+        chunker.token_estimate = json.dumps(self.calibration(), sort_keys=True)
+        return chunker
+
+    def stats(self) -> Dict[str, float]:
+        """
+        How many span counts were estimated and how many were exact.
+        """
+        total = self.estimated + self.exact
+        return {
+            "estimated": self.estimated,
+            "exact": self.exact,
+            "exact_fraction": self.exact / total if total else 0.0
+        }
+
+    def load(self, path: str):
+        """
+        Read a calibration written by save().
+        """
+        with open(path) as f:
+            data = json.load(f)
+        self.chars_per_token = data["chars_per_token"]
+        self.lower_ratio = data["lower_ratio"]
+        self.upper_ratio = data["upper_ratio"]
+
+    def save(self, path: str):
+        """
+        Persist the calibration, replacing the file atomically.
+        """
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.calibration(), f)
+        os.replace(tmp_path, path)